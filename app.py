@@ -3,26 +3,69 @@ Streamlit Web Application for Archaeological Survey RAG Chatbot
 Enhanced UI with visualization and archaeology-specific tools.
 """
 
+import functools
+import hashlib
+import json
+import multiprocessing
 import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
+from string import Template
 from datetime import datetime
+from typing import TYPE_CHECKING, Dict, List, Optional
 
-import pandas as pd
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from streamlit.runtime.scriptrunner.script_run_context import SCRIPT_RUN_CONTEXT_ATTR_NAME
 
-from pdf_processor import PDFProcessor
-from rag_chain import ArchaeologicalRAGChain
-from vector_store import VectorStoreManager
-from photo_organizer import PhotoOrganizer
-from artifact_assessment import ArtifactAssessment
 from user_manager import UserManager, StreamlitSessionManager
-from report_generator import ReportGenerator
-from PIL import Image
+from data_manager import encode_json
 import logging
 
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+    import pydeck as pdk
+    from PIL import Image
+    from rag_chain import ArchaeologicalRAGChain
+    from report_generator import ReportGenerator
+    from vector_store import VectorStoreManager
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+# "infinity" moves encoding to a shared server (see vector_store.load_embeddings)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "onnx-int8")
+# Set WARMUP_ON_START=0 to load models on first use instead (e.g. in CI)
+WARMUP_ON_START = os.getenv("WARMUP_ON_START", "1") != "0"
+VECTOR_STORE_DIR = "./vector_store"
+LLM_MODEL = "gpt-3.5-turbo"
+LLM_TEMPERATURE = 0.7
+SEMANTIC_CACHE_THRESHOLD = 0.95
+# Cached answers expire an hour after they are stored so they don't outlive prompt or model changes
+ANSWER_CACHE_TTL_SECONDS = 3600
+HEXAGON_LAYER_MIN_POINTS = 500
+# Timeline bars beyond this are sampled; Vega-Lite inlines every row as JSON
+TIMELINE_MAX_ROWS = 1000
+PHOTO_THUMBNAIL_SIZE = 256
+# Twice the 400 px display width, for high-DPI screens
+UPLOAD_PREVIEW_SIZE = 800
+# Vector stores (with their RAG chains and answer caches) kept in memory per process
+MAX_CACHED_STORES = 4
+CHAT_DB_PATH = "./user_data/chat.db"
+LLM_CACHE_PATH = "./user_data/llm_cache.db"
+CHAT_HISTORY_PAGE_SIZE = 20
+QUERY_WORKERS_PER_SESSION = 4
+QUERY_POLL_SECONDS = 0.3
+
 # Page configuration
 st.set_page_config(
     page_title="Archaeological Survey Assistant",
@@ -32,8 +75,10 @@ st.set_page_config(
 )
 
 # Custom CSS for a more modern, user‑friendly UI
-st.markdown(
-    """
+@st.cache_data(show_spinner=False)
+def _css() -> str:
+    """Page stylesheet, built once per process."""
+    return """
     <style>
     .main-header {
         font-size: 2.6rem;
@@ -76,19 +121,138 @@ st.markdown(
         margin-bottom: 0.25rem;
     }
     </style>
-    """,
-    unsafe_allow_html=True,
-)
+    """
+
+
+st.markdown(_css(), unsafe_allow_html=True)
+
+
+STARTER_QUESTIONS = {
+    "Field Work": "Help me identify this artifact and determine appropriate dating methods:",
+    "Documentation": "Generate a survey methodology template for a walkover survey:",
+    "Legal & Compliance": "What permits might be required for a survey in this region?",
+    "Site Management": "What preservation strategy would you recommend for this site?",
+}
+
+GLOSSARY = {
+    "Context": "A discrete unit of stratigraphy representing a single event of deposition or cut.",
+    "Stratigraphy": "The study and recording of layered deposits and their relationships over time.",
+    "Feature": "A non-portable archaeological element such as a pit, ditch, wall, or hearth.",
+    "Assemblage": "A group of artifacts found together in the same context, interpreted as related.",
+    "Phase": "A group of contexts interpreted as belonging to the same broad period of activity.",
+    "Datum": "A fixed reference point used for surveying and recording elevations.",
+    "Transect": "A systematic survey line or corridor walked during field survey.",
+}
+
+
+@st.cache_data(show_spinner=False)
+def _chat_header_html() -> str:
+    """Title and subtitle of the chat tab as a single HTML block."""
+    return (
+        '<h1 class="main-header">🏛️ Archaeological Survey Assistant</h1>'
+        '<div class="sub-header">Ask questions, analyse sites, plan surveys, and check compliance using your own archaeological documents.</div>'
+    )
+
+
+@st.cache_data(show_spinner=False)
+def _glossary_markdown() -> str:
+    """Full glossary as pre-rendered Markdown bullets."""
+    return "\n".join(f"- **{term}**: {definition}" for term, definition in GLOSSARY.items())
+
+
+@st.cache_resource(show_spinner=False)
+def get_chat_db() -> Dict:
+    """
+    Shared SQLite connection holding every session's chat history.
+
+    WAL mode keeps appends cheap and lets readers run alongside the writer;
+    the lock serialises use of the one connection across Streamlit threads.
+    """
+    Path(CHAT_DB_PATH).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(CHAT_DB_PATH, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS messages "
+        "(session TEXT, ts REAL, role TEXT, content TEXT, sources TEXT)"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_session_ts ON messages (session, ts)")
+    conn.commit()
+    return {"conn": conn, "lock": threading.Lock()}
+
+
+def _chat_owner() -> str:
+    """
+    Key of the chat history shown to this browser session.
+
+    Logged-in users get their own history by user ID, which survives app
+    restarts and follows them across browsers; anonymous sessions keep a
+    per-session log.
+    """
+    user_data = st.session_state.get("user_data")
+    if user_data:
+        return f"user:{user_data['user_id']}"
+    return st.session_state.chat_session_id
+
+
+def append_chat_message(role: str, content: str, sources: Optional[List[Dict]] = None):
+    """Append one message to the current chat session's history."""
+    db = get_chat_db()
+    with db["lock"]:
+        db["conn"].execute(
+            "INSERT INTO messages (session, ts, role, content, sources) VALUES (?, ?, ?, ?, ?)",
+            (
+                _chat_owner(),
+                time.time(),
+                role,
+                content,
+                json.dumps(sources, default=str) if sources else None,
+            ),
+        )
+        db["conn"].commit()
+
+
+def load_chat_messages(limit: int) -> List[Dict]:
+    """
+    Load the most recent messages of the current chat session.
+
+    Returns up to limit + 1 messages, oldest first, so callers can tell
+    whether earlier history exists without a separate COUNT query.
+    """
+    db = get_chat_db()
+    with db["lock"]:
+        rows = db["conn"].execute(
+            "SELECT role, content, sources FROM messages WHERE session = ? "
+            "ORDER BY ts DESC LIMIT ?",
+            (_chat_owner(), limit + 1),
+        ).fetchall()
+    return [
+        {"role": role, "content": content, "sources": json.loads(sources) if sources else []}
+        for role, content, sources in reversed(rows)
+    ]
+
+
+def _queue_starter_question(prompt: str):
+    """Button callback: add a starter question to the chat history."""
+    append_chat_message("user", prompt + " (replace with your details).")
+
+
+def _load_earlier_messages():
+    """Button callback: extend the rendered chat window by one page."""
+    st.session_state.chat_history_limit += CHAT_HISTORY_PAGE_SIZE
 
 
 def initialize_session_state():
     """Initialize session state variables"""
-    if 'messages' not in st.session_state:
-        st.session_state.messages = []
+    if 'chat_session_id' not in st.session_state:
+        st.session_state.chat_session_id = uuid.uuid4().hex
+    if 'chat_history_limit' not in st.session_state:
+        st.session_state.chat_history_limit = CHAT_HISTORY_PAGE_SIZE
     if 'vector_store_initialized' not in st.session_state:
         st.session_state.vector_store_initialized = False
     if 'rag_chain' not in st.session_state:
         st.session_state.rag_chain = None
+    if 'rag_store_key' not in st.session_state:
+        st.session_state.rag_store_key = None
     if 'vector_store_manager' not in st.session_state:
         st.session_state.vector_store_manager = None
     if 'active_mode' not in st.session_state:
@@ -111,51 +275,567 @@ def initialize_session_state():
         st.session_state.session_manager = StreamlitSessionManager(st.session_state.user_manager)
     if 'show_registration' not in st.session_state:
         st.session_state.show_registration = False
+    if 'query_jobs' not in st.session_state:
+        st.session_state.query_jobs = {}
+
+
+COPY_BLOCK_SIZE = 1024 * 1024
+# Uploads are written here only for the PDF worker processes to read; RAM-backed where possible
+UPLOAD_SCRATCH_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+# Free space left in UPLOAD_SCRATCH_DIR after an upload, else the disk temp dir is used
+UPLOAD_SCRATCH_RESERVE = 64 * 1024 * 1024
+
+
+def _write_scratch_copy(uploaded_file) -> str:
+    """
+    Copy an upload to a scratch file in blocks, for the PDF worker processes.
+
+    Falls back to the regular temp dir when the RAM-backed one is too small.
+    The partial file is removed if the copy fails.
+
+    Returns:
+        Path of the scratch file; the caller removes it
+    """
+    scratch_dir = UPLOAD_SCRATCH_DIR
+    if shutil.disk_usage(scratch_dir).free < uploaded_file.size + UPLOAD_SCRATCH_RESERVE:
+        scratch_dir = tempfile.gettempdir()
+    fd, path = tempfile.mkstemp(suffix=".pdf", dir=scratch_dir)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            uploaded_file.seek(0)
+            shutil.copyfileobj(uploaded_file, f, COPY_BLOCK_SIZE)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
 
 
-def process_pdf_and_create_vector_store(pdf_path: str):
+def _file_digest(path: str) -> str:
+    """Content hash of a file, used as the cache key for PDF-derived resources."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(COPY_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _upload_digest(uploaded_file) -> str:
+    """
+    Content hash of an uploaded file, hashed in memory once per upload.
+
+    Returns:
+        The same digest _file_digest would compute for the file on disk
+    """
+    cached = st.session_state.get("upload_digest")
+    if cached and cached[0] == uploaded_file.file_id:
+        return cached[1]
+    digest = hashlib.blake2b(uploaded_file.getbuffer(), digest_size=16).hexdigest()
+    st.session_state.upload_digest = (uploaded_file.file_id, digest)
+    return digest
+
+
+@st.cache_resource(show_spinner=False)
+def get_pdf_executor() -> ProcessPoolExecutor:
+    """Process pool for CPU-bound PDF parsing, shared by all sessions."""
+    # spawn avoids forking the Streamlit server's threads into the workers
+    return ProcessPoolExecutor(
+        max_workers=os.cpu_count(),
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+@st.cache_data(persist="disk", show_spinner=False)
+def process_pdf(pdf_hash: str, _pdf_path: str) -> Dict[str, List]:
+    """
+    Extract text chunks plus coordinates, dates, and sites from a PDF.
+
+    Page extraction and the three structured extractions run in the worker
+    process pool. Cached on disk by PDF content hash, so re-processing the
+    same document - in a new session or after a restart - skips parsing.
+    Only plain lists are cached; DataFrames are built by the caller.
+    """
+    from pdf_processor import PDFProcessor
+
+    executor = get_pdf_executor()
+    processor = PDFProcessor(_pdf_path)
+    text = processor.extract_text_parallel(executor)
+    text_chunks = processor.chunk_text(text, chunk_size=1000, chunk_overlap=200)
+
+    # The processor now carries full_text, so workers don't re-read the PDF
+    extracted = processor.extract_all(executor)
+    extracted["text_chunks"] = text_chunks
+    return extracted
+
+
+def _warm_embeddings(embedding_model: str, backend: str):
+    """Load the embedding model and run one encode so lazy runtime setup is paid up front."""
+    from vector_store import load_embeddings
+
+    embeddings = load_embeddings(embedding_model, backend)
+    embeddings.embed_query("archaeological survey")
+    # The LangChain/OpenAI client stack is the other slow import on first use
+    import rag_chain  # noqa: F401
+    return embeddings
+
+
+@st.cache_resource(show_spinner=False)
+def start_embedding_warmup(embedding_model: str, backend: str = EMBEDDING_BACKEND) -> Future:
+    """Start loading the embedding model in a background thread, once per process."""
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding-warmup")
+    future = executor.submit(_warm_embeddings, embedding_model, backend)
+    executor.shutdown(wait=False)
+    return future
+
+
+@st.cache_resource(show_spinner=False)
+def get_embeddings(embedding_model: str, backend: str = EMBEDDING_BACKEND):
+    """Shared embedding model, taken from the startup warmup when it has run."""
+    try:
+        return start_embedding_warmup(embedding_model, backend).result()
+    except Exception as e:
+        logger.warning(f"Embedding warmup failed, loading in the foreground: {e}")
+        from vector_store import load_embeddings
+        return load_embeddings(embedding_model, backend)
+
+
+@st.cache_resource(show_spinner=False, max_entries=MAX_CACHED_STORES)
+def get_vector_store_manager(store_key: str, embedding_model: str, persist_directory: str,
+                             backend: str = EMBEDDING_BACKEND) -> "VectorStoreManager":
+    """
+    Load the persisted vector store once per version and share it across sessions.
+
+    store_key carries the index file's mtime, so a store rebuilt by another
+    session or process is loaded afresh instead of reusing the old mmapped index.
+    """
+    from vector_store import VectorStoreManager
+
+    vector_store_manager = VectorStoreManager(
+        embedding_model=embedding_model,
+        vector_store_type="faiss",
+        persist_directory=persist_directory,
+        backend=backend,
+        embeddings=get_embeddings(embedding_model, backend)
+    )
+    vector_store_manager.load_vector_store(mmap=True)
+    return vector_store_manager
+
+
+# Auto-extracted tables persisted alongside the FAISS index, by session_state key
+AUTO_EXTRACT_FILES = {
+    "sites_df": "auto_sites.parquet",
+    "timeline_df": "auto_timeline.parquet",
+    "sites_list": "auto_site_list.parquet",
+}
+
+
+def _save_auto_extract(persist_directory: str, tables: "Dict[str, Optional[pd.DataFrame]]"):
+    """Write the auto-extracted tables next to the index, removing ones that are empty now."""
+    for name, file_name in AUTO_EXTRACT_FILES.items():
+        path = Path(persist_directory) / file_name
+        df = tables.get(name)
+        if df is None or df.empty:
+            path.unlink(missing_ok=True)
+        else:
+            df.to_parquet(path, compression="zstd")
+
+
+@st.cache_data(show_spinner=False)
+def load_auto_extract(store_key: str, persist_directory: str) -> "Dict[str, Optional[pd.DataFrame]]":
+    """Read the tables saved with a persisted store; store_key ties the cache to its version."""
+    import pandas as pd
+
+    tables = {}
+    for name, file_name in AUTO_EXTRACT_FILES.items():
+        path = Path(persist_directory) / file_name
+        tables[name] = pd.read_parquet(path) if path.exists() else None
+    return tables
+
+
+@st.cache_resource(show_spinner=False)
+def get_built_stores() -> Dict:
+    """Vector stores built from uploaded PDFs, most recently used last."""
+    return {"managers": OrderedDict(), "lock": threading.Lock()}
+
+
+def build_vector_store_manager(pdf_hash: str, embedding_model: str, persist_directory: str,
+                               text_chunks: List[str],
+                               backend: str = EMBEDDING_BACKEND,
+                               progress_callback=None,
+                               tables: "Optional[Dict[str, Optional[pd.DataFrame]]]" = None
+                               ) -> "VectorStoreManager":
+    """
+    Embed a PDF's chunks once per content hash and share the store across sessions.
+
+    tables (auto-extracted sites/timeline) are saved next to the index whenever
+    it is written, so loading the persisted store later can restore them.
+
+    Kept in a registry rather than behind st.cache_resource so progress_callback
+    can update elements created by the caller (cached functions replay their
+    element calls, which fails for elements created outside them).
+    """
+    from vector_store import VectorStoreManager
+
+    key = (pdf_hash, embedding_model, persist_directory, backend)
+    built = get_built_stores()
+    # Held while building so concurrent uploads of the same PDF embed it once
+    with built["lock"]:
+        if key in built["managers"]:
+            built["managers"].move_to_end(key)
+            return built["managers"][key]
+
+        vector_store_manager = VectorStoreManager(
+            embedding_model=embedding_model,
+            vector_store_type="faiss",
+            persist_directory=persist_directory,
+            backend=backend,
+            embeddings=get_embeddings(embedding_model, backend)
+        )
+        vector_store_manager.create_vector_store(text_chunks, progress_callback=progress_callback)
+        _save_auto_extract(persist_directory, tables or {})
+        built["managers"][key] = vector_store_manager
+        while len(built["managers"]) > MAX_CACHED_STORES:
+            built["managers"].popitem(last=False)
+
+    # The persisted index was just overwritten, so any cached load is stale
+    get_vector_store_manager.clear()
+    _vector_store_exists.clear()
+    return vector_store_manager
+
+
+@st.cache_resource(show_spinner=False, max_entries=MAX_CACHED_STORES)
+def get_rag_chain(store_key: str, model_name: str, temperature: float,
+                  _vector_store_manager: "VectorStoreManager") -> "ArchaeologicalRAGChain":
+    """Build the RAG chain (and its LLM client) once per vector store."""
+    from rag_chain import ArchaeologicalRAGChain
+
+    return ArchaeologicalRAGChain(
+        vector_store_manager=_vector_store_manager,
+        model_name=model_name,
+        temperature=temperature
+    )
+
+
+@st.cache_resource(show_spinner=False)
+def enable_llm_cache(database_path: str = LLM_CACHE_PATH):
+    """
+    Persist LLM responses in SQLite, once per process.
+
+    Covers non-streamed calls (rag_chain.query from the report and engagement
+    helpers), so a repeated prompt skips the OpenAI round trip even after a
+    restart. LangChain does not consult the cache when streaming; streamed
+    answers rely on the semantic cache below.
+    """
+    try:
+        from langchain_community.cache import SQLiteCache
+        from langchain_core.globals import set_llm_cache
+    except ImportError as e:
+        logger.warning(f"LLM response cache unavailable: {e}")
+        return
+    Path(database_path).parent.mkdir(parents=True, exist_ok=True)
+    set_llm_cache(SQLiteCache(database_path=database_path))
+
+
+# One entry per store and scope (five sidebar modes, compliance tools, artifact assessments)
+@st.cache_resource(show_spinner=False, max_entries=MAX_CACHED_STORES * 7)
+def get_semantic_cache(store_key: str, mode: str) -> Dict:
+    """
+    Past RAG results for one store and assistant mode (or tool).
+
+    Scoped per mode, and so per prompt template, so templated prompts never
+    answer each other. The index holds embeddings of users' questions only.
+    Entries are (time stored, result) pairs, oldest first.
+    """
+    return {"index": None, "results": [], "exact": {}, "lock": threading.Lock()}
+
+
+def _expire_semantic_cache(cache: Dict, now: float):
+    """Drop entries stored more than ANSWER_CACHE_TTL_SECONDS ago; call with the lock held."""
+    cutoff = now - ANSWER_CACHE_TTL_SECONDS
+    exact = cache["exact"]
+    while exact:
+        oldest = next(iter(exact))
+        if exact[oldest][0] >= cutoff:
+            break
+        del exact[oldest]
+
+    results = cache["results"]
+    expired = 0
+    while expired < len(results) and results[expired][0] < cutoff:
+        expired += 1
+    if expired:
+        import faiss
+
+        # Removing from a flat index renumbers the rest from 0, like the list
+        cache["index"].remove_ids(faiss.IDSelectorRange(0, expired))
+        del results[:expired]
+
+
+def _semantic_cache_lookup(prompt: str, mode: Optional[str] = None,
+                           question: Optional[str] = None):
+    """
+    Look up a previous RAG result for the same or a near-identical question.
+
+    A verbatim repeat of the full prompt is answered from an exact-match table.
+    Only when the user's own question is given is it also embedded and compared
+    by cosine similarity against earlier questions in the same store and mode.
+    Embedding the whole prompt would let fixed template text dominate the
+    vector, so templated tool and assessment prompts are matched exactly only.
+
+    Args:
+        prompt: Full prompt sent to the RAG chain
+        mode: Cache scope; defaults to the active chat mode
+        question: The user's question inside prompt, for similarity matching
+
+    Returns:
+        Tuple of (cache, question vector or None, cached result or None)
+    """
+    rag_chain = st.session_state.rag_chain
+    cache = get_semantic_cache(
+        st.session_state.rag_store_key or "", mode or st.session_state.active_mode
+    )
+    with cache["lock"]:
+        _expire_semantic_cache(cache, time.monotonic())
+        entry = cache["exact"].get(prompt.strip())
+    result = entry[1] if entry is not None else None
+    if result is not None or not question:
+        return cache, None, result
+
+    import faiss
+    import numpy as np
+
+    embeddings = rag_chain.vector_store_manager.embeddings
+    vector = np.asarray([embeddings.embed_query(question.strip())], dtype="float32")
+    faiss.normalize_L2(vector)
+
+    with cache["lock"]:
+        index = cache["index"]
+        if index is not None and index.ntotal:
+            scores, ids = index.search(vector, 1)
+            if scores[0][0] >= SEMANTIC_CACHE_THRESHOLD:
+                logger.info(f"Semantic cache hit (similarity {scores[0][0]:.3f})")
+                return cache, vector, cache["results"][ids[0][0]][1]
+
+    return cache, vector, None
+
+
+def _semantic_cache_store(cache: Dict, prompt: str, vector: "Optional[np.ndarray]", result: dict):
+    """
+    Remember a RAG result; only grounded answers whose generation succeeded are kept.
+
+    It is matched by exact prompt, and also by similarity if the question's
+    vector is given.
+    """
+    import faiss
+
+    if not result.get("source_documents") or result.get("failed"):
+        return
+    stored_at = time.monotonic()
+    with cache["lock"]:
+        # Re-inserted so the table stays ordered by time stored
+        cache["exact"].pop(prompt.strip(), None)
+        cache["exact"][prompt.strip()] = (stored_at, result)
+        if vector is None:
+            return
+        if cache["index"] is None:
+            cache["index"] = faiss.IndexFlatIP(vector.shape[1])
+        cache["index"].add(vector)
+        cache["results"].append((stored_at, result))
+
+
+def stream_query(prompt: str, mode: Optional[str] = None,
+                 question: Optional[str] = None) -> dict:
+    """
+    Answer a prompt into the current container, streaming tokens on a cache miss.
+
+    Cached answers are rendered at once; new ones are written as the LLM
+    generates them and then added to the cache. mode and question are as for
+    _semantic_cache_lookup.
+
+    Returns:
+        Result dict with "answer", "source_documents" and "failed" (whether
+        generation stopped with an error)
+    """
+    cache, vector, result = _semantic_cache_lookup(prompt, mode, question)
+    if result is not None:
+        st.markdown(result["answer"])
+        return result
+
+    source_documents, answer_stream = st.session_state.rag_chain.query_stream(prompt)
+    answer = st.write_stream(answer_stream)
+    result = {
+        "answer": answer, "source_documents": source_documents, "failed": answer_stream.failed,
+    }
+    _semantic_cache_store(cache, prompt, vector, result)
+    return result
+
+
+def get_query_pool() -> ThreadPoolExecutor:
+    """
+    This session's background threads for RAG queries and reports.
+
+    Each session gets its own few threads, so one user's jobs never queue
+    behind another's. The pool lives in session_state and its idle threads
+    exit once the session ends and the pool is garbage-collected.
+    """
+    if "query_pool" not in st.session_state:
+        st.session_state.query_pool = ThreadPoolExecutor(
+            max_workers=QUERY_WORKERS_PER_SESSION, thread_name_prefix="rag-query"
+        )
+    return st.session_state.query_pool
+
+
+def _run_query_job(rag_chain, cache: Dict, prompt: str, vector: "np.ndarray",
+                   chunks: List[str]) -> dict:
+    """Stream an answer into chunks (read by the polling fragment), then cache it."""
+    source_documents, answer_stream = rag_chain.query_stream(prompt)
+    for chunk in answer_stream:
+        chunks.append(chunk)
+    result = {
+        "answer": "".join(chunks), "source_documents": source_documents,
+        "failed": answer_stream.failed,
+    }
+    _semantic_cache_store(cache, prompt, vector, result)
+    return result
+
+
+def submit_query(job_key: str, prompt: str, mode: Optional[str] = None):
+    """
+    Start answering a prompt in the background under job_key.
+
+    The answer keeps generating if the user switches tabs or edits other
+    widgets; render_query_job shows it as it arrives.
+    """
+    cache, vector, result = _semantic_cache_lookup(prompt, mode)
+    chunks: List[str] = []
+    if result is None:
+        future = get_query_pool().submit(
+            _run_query_job, st.session_state.rag_chain, cache, prompt, vector, chunks
+        )
+    else:
+        future = Future()
+        future.set_result(result)
+    st.session_state.query_jobs[job_key] = {"future": future, "chunks": chunks}
+
+
+def _run_with_script_ctx(ctx, fn, *args):
+    """Run fn on a pool thread with the submitting script run's context attached."""
+    thread = threading.current_thread()
+    add_script_run_ctx(thread, ctx)
+    try:
+        return fn(*args)
+    finally:
+        # Pool threads are reused; a stale context would keep its session alive
+        delattr(thread, SCRIPT_RUN_CONTEXT_ATTR_NAME)
+
+
+def submit_job(job_key: str, fn, *args, render=None, chunks: Optional[List[str]] = None):
+    """
+    Run fn(*args) on the query pool under job_key and show it with render_query_job.
+
+    The script run's context is attached to the worker, so fn may use
+    st.session_state and Streamlit's caches; it must not draw elements.
+
+    Args:
+        job_key: Session key of the job (a new job replaces the previous one)
+        fn: Long-running callable, e.g. report generation
+        render: Draws fn's result once done (defaults to the "answer" as Markdown)
+        chunks: List fn appends partial answer text to while it runs
+    """
+    future = get_query_pool().submit(_run_with_script_ctx, get_script_run_ctx(), fn, *args)
+    st.session_state.query_jobs[job_key] = {
+        "future": future, "chunks": [] if chunks is None else chunks, "render": render,
+    }
+
+
+def _show_query_job(job_key: str):
+    """Fragment body for render_query_job."""
+    job = st.session_state.query_jobs[job_key]
+    future = job["future"]
+    if not future.done():
+        st.markdown("".join(job["chunks"]) or "⏳ Generating...")
+        return
+    if job["polling"]:
+        # Rerun once so the fragment is recreated without a polling interval
+        job["polling"] = False
+        st.rerun()
+    try:
+        result = future.result()
+    except Exception as e:
+        logger.error(f"Background query failed: {e}")
+        st.error(f"Error generating answer: {e}")
+        return
+    if job.get("render") is None:
+        st.markdown(result["answer"])
+    else:
+        job["render"](result)
+
+
+def render_query_job(job_key: str):
+    """Show a background query's answer, polling as a fragment while it is generating."""
+    job = st.session_state.query_jobs.get(job_key)
+    if job is None:
+        return
+    # Kept on the job rather than passed in: Streamlit reuses the closure (and
+    # arguments) from a fragment's first registration on fragment reruns
+    job["polling"] = not job["future"].done()
+    st.fragment(_show_query_job, run_every=QUERY_POLL_SECONDS if job["polling"] else None)(
+        job_key
+    )
+
+
+# Columns and dtypes of the records PDFProcessor extracts for the map and timeline
+AUTO_SITE_COLUMNS = {
+    "site_name": "object", "latitude": "float64", "longitude": "float64", "context": "object",
+}
+AUTO_TIMELINE_COLUMNS = {
+    "site_name": "object", "label": "object", "start_year": "int32", "end_year": "int32",
+    "context": "object",
+}
+
+
+def _records_frame(records: List[Dict], columns: Dict[str, str]) -> "Optional[pd.DataFrame]":
+    """Build a typed DataFrame from extracted records, or None if there are none."""
+    import pandas as pd
+
+    if not records:
+        return None
+    return pd.DataFrame.from_records(records, columns=list(columns)).astype(columns)
+
+
+def process_pdf_and_create_vector_store(pdf_path: str, pdf_hash: Optional[str] = None):
     """Process PDF and create vector store"""
+    import pandas as pd
+
     try:
-        with st.spinner("Processing PDF document..."):
-            # Process PDF
-            processor = PDFProcessor(pdf_path)
-            text_chunks = processor.process(chunk_size=1000, chunk_overlap=200)
+        with st.status("Processing PDF document...", expanded=False) as status:
+            pdf_hash = pdf_hash or _file_digest(pdf_path)
+            extracted = process_pdf(pdf_hash, pdf_path)
+            status.update(label="PDF processed", state="complete")
 
-            # Automatic extraction of coordinates, dates, and sites for visualisations
-            try:
-                coords = processor.extract_coordinates()
-                dates = processor.extract_dates()
-                sites = processor.extract_sites()
+            text_chunks = extracted["text_chunks"]
+            coords = extracted["coords"]
+            dates = extracted["dates"]
+            sites = extracted["sites"]
 
+            # Automatic extraction of coordinates, dates, and sites for visualisations
+            st.session_state.sites_df = _records_frame(coords, AUTO_SITE_COLUMNS)
+            st.session_state.timeline_df = _records_frame(dates, AUTO_TIMELINE_COLUMNS)
+            st.session_state.sites_list = sites or None
+            auto_tables = {
+                "sites_df": st.session_state.sites_df,
+                "timeline_df": st.session_state.timeline_df,
+                "sites_list": pd.DataFrame.from_records(sites) if sites else None,
+            }
+
+            if coords or dates or sites:
+                extraction_summary = []
                 if coords:
-                    st.session_state.sites_df = pd.DataFrame(coords)
-                else:
-                    st.session_state.sites_df = None
-
+                    extraction_summary.append(f"{len(coords)} coordinate(s)")
                 if dates:
-                    st.session_state.timeline_df = pd.DataFrame(dates)
-                else:
-                    st.session_state.timeline_df = None
-                
+                    extraction_summary.append(f"{len(dates)} date(s)")
                 if sites:
-                    st.session_state.sites_list = sites
-                else:
-                    st.session_state.sites_list = None
-                    
-                if coords or dates or sites:
-                    extraction_summary = []
-                    if coords:
-                        extraction_summary.append(f"{len(coords)} coordinate(s)")
-                    if dates:
-                        extraction_summary.append(f"{len(dates)} date(s)")
-                    if sites:
-                        extraction_summary.append(f"{len(sites)} site(s)")
-                    st.info(f"📊 Auto-extracted: {', '.join(extraction_summary)} from PDF")
-            except Exception as e:  # pragma: no cover
-                logger.warning(f"Auto-extraction for maps/timelines failed: {e}")
-                st.session_state.sites_df = None
-                st.session_state.timeline_df = None
-                st.session_state.sites_list = None
+                    extraction_summary.append(f"{len(sites)} site(s)")
+                st.info(f"📊 Auto-extracted: {', '.join(extraction_summary)} from PDF")
             
             if not text_chunks:
                 st.error("No text could be extracted from the PDF.")
@@ -163,27 +843,28 @@ def process_pdf_and_create_vector_store(pdf_path: str):
             
             st.success(f"Extracted {len(text_chunks)} text chunks from PDF")
             
-            # Create vector store
-            with st.spinner("Creating vector embeddings..."):
-                vector_store_manager = VectorStoreManager(
-                    embedding_model="sentence-transformers/all-MiniLM-L6-v2",
-                    vector_store_type="faiss",
-                    persist_directory="./vector_store"
-                )
-                vector_store_manager.create_vector_store(text_chunks)
-                st.session_state.vector_store_manager = vector_store_manager
-                st.session_state.vector_store_initialized = True
-                st.success("Vector store created successfully!")
+            # Create vector store (the bar only moves on a cache miss)
+            progress = st.progress(0.0, text="Creating vector embeddings...")
+            vector_store_manager = build_vector_store_manager(
+                pdf_hash, EMBEDDING_MODEL, VECTOR_STORE_DIR, text_chunks,
+                progress_callback=lambda done: progress.progress(
+                    done, text="Creating vector embeddings..."
+                ),
+                tables=auto_tables,
+            )
+            progress.empty()
+            st.session_state.vector_store_manager = vector_store_manager
+            st.session_state.vector_store_initialized = True
+            st.success("Vector store created successfully!")
             
             # Initialize RAG chain
             with st.spinner("Initializing RAG chain..."):
                 try:
-                    rag_chain = ArchaeologicalRAGChain(
-                        vector_store_manager=vector_store_manager,
-                        model_name="gpt-3.5-turbo",
-                        temperature=0.7
+                    rag_chain = get_rag_chain(
+                        pdf_hash, LLM_MODEL, LLM_TEMPERATURE, vector_store_manager
                     )
                     st.session_state.rag_chain = rag_chain
+                    st.session_state.rag_store_key = pdf_hash
                     st.success("RAG system ready!")
                     return True
                 except Exception as e:
@@ -199,53 +880,85 @@ def process_pdf_and_create_vector_store(pdf_path: str):
 def load_existing_vector_store():
     """Load existing vector store if available"""
     try:
-        vector_store_manager = VectorStoreManager(
-            embedding_model="sentence-transformers/all-MiniLM-L6-v2",
-            vector_store_type="faiss",
-            persist_directory="./vector_store"
-        )
-        vector_store_manager.load_vector_store()
+        # Key shared resources on the index file's mtime: rebuilding the store
+        # in any session then gives new chains and caches, not stale ones
+        store_key = f"{VECTOR_STORE_DIR}@{(Path(VECTOR_STORE_DIR) / 'index.faiss').stat().st_mtime_ns}"
+        vector_store_manager = get_vector_store_manager(store_key, EMBEDDING_MODEL, VECTOR_STORE_DIR)
         st.session_state.vector_store_manager = vector_store_manager
         st.session_state.vector_store_initialized = True
         
         # Initialize RAG chain
-        rag_chain = ArchaeologicalRAGChain(
-            vector_store_manager=vector_store_manager,
-            model_name="gpt-3.5-turbo",
-            temperature=0.7
+        rag_chain = get_rag_chain(
+            store_key, LLM_MODEL, LLM_TEMPERATURE, vector_store_manager
         )
         st.session_state.rag_chain = rag_chain
+        st.session_state.rag_store_key = store_key
+
+        # Restore the map/timeline data extracted when the store was built
+        tables = load_auto_extract(store_key, VECTOR_STORE_DIR)
+        st.session_state.sites_df = tables["sites_df"]
+        st.session_state.timeline_df = tables["timeline_df"]
+        sites_list = tables["sites_list"]
+        st.session_state.sites_list = (
+            sites_list.to_dict("records") if sites_list is not None else None
+        )
         return True
     except Exception as e:
         logger.info(f"Could not load existing vector store: {e}")
         return False
 
 
+def _rag_ready() -> bool:
+    """Whether a vector store is loaded and the RAG chain is ready to answer."""
+    session = st.session_state
+    return bool(session.get("vector_store_initialized")) and session.get("rag_chain") is not None
+
+
+# Instruction prepended to chat prompts per assistant mode
+# Simplified modes: merged from 11 into 4 user-friendly categories
+_MODE_PREFACE = {
+    "General Q&A": "",
+    "Field Work & Analysis": (
+        "You are assisting with field work tasks including artifact identification, dating assistance, "
+        "stratigraphy analysis, site classification, and terminology explanations. "
+        "Provide practical, field-ready guidance based on archaeological best practices. "
+    ),
+    "Documentation & Reporting": (
+        "You are helping with documentation tasks including report generation, methodology templates, "
+        "citation formatting, and creating structured documentation. Focus on professional standards and clarity. "
+    ),
+    "Legal & Compliance": (
+        "You are guiding about permits, heritage laws, legal compliance, and ethical guidelines. "
+        "Always remind users to check the latest local regulations and consult authorities. "
+        "Emphasize community engagement and long-term conservation. "
+    ),
+    "Site Management": (
+        "You are advising on site preservation, conservation strategies, risk assessment, and site management. "
+        "Consider physical, chemical, and human threats and recommend minimally invasive strategies. "
+    ),
+}
+
+
 def _build_mode_preface(mode: str) -> str:
     """Short instruction that biases the LLM towards a specialized archaeological task."""
-    # Simplified modes: merged from 11 into 4 user-friendly categories
-    mapping = {
-        "General Q&A": "",
-        "Field Work & Analysis": (
-            "You are assisting with field work tasks including artifact identification, dating assistance, "
-            "stratigraphy analysis, site classification, and terminology explanations. "
-            "Provide practical, field-ready guidance based on archaeological best practices. "
-        ),
-        "Documentation & Reporting": (
-            "You are helping with documentation tasks including report generation, methodology templates, "
-            "citation formatting, and creating structured documentation. Focus on professional standards and clarity. "
-        ),
-        "Legal & Compliance": (
-            "You are guiding about permits, heritage laws, legal compliance, and ethical guidelines. "
-            "Always remind users to check the latest local regulations and consult authorities. "
-            "Emphasize community engagement and long-term conservation. "
-        ),
-        "Site Management": (
-            "You are advising on site preservation, conservation strategies, risk assessment, and site management. "
-            "Consider physical, chemical, and human threats and recommend minimally invasive strategies. "
-        ),
-    }
-    return mapping.get(mode, "")
+    return _MODE_PREFACE.get(mode, "")
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _find_default_pdf() -> Optional[str]:
+    """Locate the bundled survey PDF, re-checking the filesystem at most once a minute."""
+    for directory in ("..", "."):
+        matches = sorted(Path(directory).glob("archelogical*.pdf"))
+        if matches:
+            logger.info(f"Found default PDF: {matches[0]}")
+            return str(matches[0])
+    return None
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _vector_store_exists() -> bool:
+    """Whether a persisted vector store is on disk, re-checked at most once a minute."""
+    return Path(VECTOR_STORE_DIR).exists()
 
 
 def _render_sidebar():
@@ -264,6 +977,9 @@ def _render_sidebar():
             st.caption(f"Role: {current_user['role']}")
             if st.button("🚪 Logout", use_container_width=True):
                 session_manager.logout(st.session_state)
+                # Start a fresh chat log; the previous one stays on disk
+                st.session_state.chat_session_id = uuid.uuid4().hex
+                st.session_state.chat_history_limit = CHAT_HISTORY_PAGE_SIZE
                 st.rerun()
         else:
             # User is not logged in
@@ -280,6 +996,7 @@ def _render_sidebar():
                             result = session_manager.login(st.session_state, login_email, login_password)
                             if result['success']:
                                 st.success(result['message'])
+                                st.session_state.chat_history_limit = CHAT_HISTORY_PAGE_SIZE
                                 st.rerun()
                             else:
                                 st.error(result['message'])
@@ -326,8 +1043,7 @@ def _render_sidebar():
         st.header("📚 Document Setup")
         
         # Check if vector store exists
-        vector_store_path = Path("./vector_store")
-        if vector_store_path.exists() and st.session_state.vector_store_initialized is False:
+        if _vector_store_exists() and st.session_state.vector_store_initialized is False:
             if st.button("Load Existing Vector Store", use_container_width=True):
                 if load_existing_vector_store():
                     st.success("Vector store loaded!")
@@ -344,29 +1060,24 @@ def _render_sidebar():
         
         if pdf_file is not None:
             st.session_state.uploaded_pdf_name = pdf_file.name
-            # Save uploaded file temporarily
-            pdf_path = f"./temp_{pdf_file.name}"
-            with open(pdf_path, "wb") as f:
-                f.write(pdf_file.getbuffer())
+            pdf_hash = _upload_digest(pdf_file)
             
             if st.button("⚙️ Process PDF and Initialize", use_container_width=True):
-                success = process_pdf_and_create_vector_store(pdf_path)
-                if success and os.path.exists(pdf_path):
+                # Worker processes need a path; the file lives only while processing
+                try:
+                    pdf_path = _write_scratch_copy(pdf_file)
+                except OSError as e:
+                    logger.error(f"Could not write upload to scratch space: {e}")
+                    st.error(f"Could not store the uploaded PDF for processing: {e}")
+                else:
+                    try:
+                        process_pdf_and_create_vector_store(pdf_path, pdf_hash)
+                    finally:
                         os.remove(pdf_path)
         
         # Default PDF path
         st.subheader("Or Use Default PDF")
-        possible_paths = [
-            "../archelogical pdf pr0ooject.pdf",
-            "archelogical pdf pr0ooject.pdf",
-            "../archelogical pdf pr0ooject.pdf",
-        ]
-        default_pdf_path = None
-        for path in possible_paths:
-            if os.path.exists(path):
-                default_pdf_path = path
-                break
-        
+        default_pdf_path = _find_default_pdf()
         if default_pdf_path:
             if st.button("📄 Process Default PDF", use_container_width=True):
                 _ = process_pdf_and_create_vector_store(default_pdf_path)
@@ -396,31 +1107,86 @@ def _render_sidebar():
 
         st.markdown("---")
         st.subheader("Quick Starter Questions")
-        examples = {
-            "Field Work": "Help me identify this artifact and determine appropriate dating methods:",
-            "Documentation": "Generate a survey methodology template for a walkover survey:",
-            "Legal & Compliance": "What permits might be required for a survey in this region?",
-            "Site Management": "What preservation strategy would you recommend for this site?",
-        }
-        for label, prompt in examples.items():
-            if st.button(label, key=f"q_{label}"):
-                st.session_state.messages.append(
-                    {"role": "user", "content": prompt + " (replace with your details)."}
-                )
+        for label, prompt in STARTER_QUESTIONS.items():
+            st.button(label, key=f"q_{label}", on_click=_queue_starter_question, args=(prompt,))
+
+
+def _render_sources(sources: List[Dict]):
+    """Expander listing the retrieved source chunks behind an answer, as one Markdown element."""
+    blocks = []
+    for source in sources:
+        blocks.append(f"**Source {source['index']}:**")
+        blocks.append(source["content"])
+        meta = source.get("metadata") or {}
+        # Try to surface page or chunk info if present
+        page = meta.get("page") or meta.get("page_number")
+        chunk_idx = meta.get("chunk_index")
+        meta_bits = []
+        if page is not None:
+            meta_bits.append(f"Page: {page}")
+        if chunk_idx is not None:
+            meta_bits.append(f"Chunk: {chunk_idx}")
+        caption = " | ".join(meta_bits) if meta_bits else (f"Metadata: {meta}" if meta else "")
+        if caption:
+            # Grey like st.caption, unless a "]" would end the colour directive early
+            blocks.append(caption if "]" in caption else f":gray[{caption}]")
+    with st.expander("📖 View Sources & Locations"):
+        st.markdown("\n\n".join(blocks))
+
+
+@st.fragment
+def _render_conversation():
+    """
+    Chat history and input.
+
+    Runs as a fragment so sending a message or loading earlier history
+    reruns only the conversation, not the sidebar and the other tabs.
+    """
+    # Display chat history (most recent page only)
+    limit = st.session_state.chat_history_limit
+    messages = load_chat_messages(limit)
+    if len(messages) > limit:
+        messages = messages[1:]
+        st.button("⬆️ Load earlier messages", on_click=_load_earlier_messages)
+    for message in messages:
+        with st.chat_message(message["role"]):
+            st.markdown(message["content"])
+            if "sources" in message and message["sources"]:
+                _render_sources(message["sources"])
+    
+    # Chat input
+    placeholder = "Ask a question about archaeological surveys, sites, or regulations..."
+    if prompt := st.chat_input(placeholder):
+        # Apply specialized mode preface
+        preface = _build_mode_preface(st.session_state.active_mode)
+        full_prompt = f"{preface} User question: {prompt}" if preface else prompt
+
+        # Add user message
+        append_chat_message("user", prompt)
+        with st.chat_message("user"):
+            st.markdown(prompt)
+        
+        # Get response
+        with st.chat_message("assistant"):
+            result = stream_query(full_prompt, question=prompt)
+            answer = result["answer"]
+
+            sources = st.session_state.rag_chain.get_sources(
+                result["source_documents"]
+            )
+
+            if sources:
+                _render_sources(sources)
+        
+        # Add assistant message
+        append_chat_message("assistant", answer, sources)
 
 
 def _render_chat_tab():
     """Main chat experience with archaeology-specific modes."""
-    st.markdown(
-        '<h1 class="main-header">🏛️ Archaeological Survey Assistant</h1>',
-        unsafe_allow_html=True,
-    )
-    st.markdown(
-        '<div class="sub-header">Ask questions, analyse sites, plan surveys, and check compliance using your own archaeological documents.</div>',
-        unsafe_allow_html=True,
-    )
+    st.markdown(_chat_header_html(), unsafe_allow_html=True)
 
-    if st.session_state.vector_store_initialized and st.session_state.rag_chain:
+    if _rag_ready():
         # Display current mode as pills
         st.markdown(
             f"**Active mode:** "
@@ -428,78 +1194,7 @@ def _render_chat_tab():
             unsafe_allow_html=True,
         )
 
-        # Display chat history
-        for message in st.session_state.messages:
-            with st.chat_message(message["role"]):
-                st.markdown(message["content"])
-                if "sources" in message and message["sources"]:
-                    with st.expander("📖 View Sources & Locations"):
-                        for source in message["sources"]:
-                            st.write(f"**Source {source['index']}:**")
-                            st.write(source["content"])
-                            meta = source.get("metadata") or {}
-                            # Try to surface page or chunk info if present
-                            page = meta.get("page") or meta.get("page_number")
-                            chunk_idx = meta.get("chunk_index")
-                            meta_bits = []
-                            if page is not None:
-                                meta_bits.append(f"Page: {page}")
-                            if chunk_idx is not None:
-                                meta_bits.append(f"Chunk: {chunk_idx}")
-                            if meta_bits:
-                                st.caption(" | ".join(meta_bits))
-                            elif meta:
-                                st.caption(f"Metadata: {meta}")
-        
-        # Chat input
-        placeholder = "Ask a question about archaeological surveys, sites, or regulations..."
-        if prompt := st.chat_input(placeholder):
-            # Apply specialized mode preface
-            preface = _build_mode_preface(st.session_state.active_mode)
-            full_prompt = f"{preface} User question: {prompt}" if preface else prompt
-
-            # Add user message
-            st.session_state.messages.append({"role": "user", "content": prompt})
-            with st.chat_message("user"):
-                st.markdown(prompt)
-            
-            # Get response
-            with st.chat_message("assistant"):
-                with st.spinner("Thinking with your archaeological documents..."):
-                    result = st.session_state.rag_chain.query(full_prompt)
-                    answer = result["answer"]
-                    sources = st.session_state.rag_chain.get_sources(
-                        result["source_documents"]
-                    )
-                    
-                    st.markdown(answer)
-                    
-                    if sources:
-                        with st.expander("📖 View Sources & Locations"):
-                            for source in sources:
-                                st.write(f"**Source {source['index']}:**")
-                                st.write(source["content"])
-                                meta = source.get("metadata") or {}
-                                page = meta.get("page") or meta.get("page_number")
-                                chunk_idx = meta.get("chunk_index")
-                                meta_bits = []
-                                if page is not None:
-                                    meta_bits.append(f"Page: {page}")
-                                if chunk_idx is not None:
-                                    meta_bits.append(f"Chunk: {chunk_idx}")
-                                if meta_bits:
-                                    st.caption(" | ".join(meta_bits))
-                                elif meta:
-                                    st.caption(f"Metadata: {meta}")
-            
-            # Add assistant message
-            st.session_state.messages.append(
-                {
-                "role": "assistant",
-                "content": answer,
-                    "sources": sources,
-                }
-            )
+        _render_conversation()
     
     else:
         # Welcome message
@@ -524,8 +1219,90 @@ def _render_chat_tab():
         )
 
 
+@st.cache_resource(show_spinner=False)
+def build_site_deck(map_df: "pd.DataFrame") -> "pdk.Deck":
+    """
+    Build the site map once per set of points.
+
+    Large point sets are binned into hexagons instead of drawn one by one.
+    """
+    import pydeck as pdk
+
+    view_state = pdk.ViewState(
+        latitude=float(map_df["latitude"].mean()),
+        longitude=float(map_df["longitude"].mean()),
+        zoom=4,
+    )
+    if len(map_df) > HEXAGON_LAYER_MIN_POINTS:
+        layer = pdk.Layer(
+            "HexagonLayer",
+            data=map_df,
+            get_position=["longitude", "latitude"],
+            radius=5000,
+            extruded=False,
+            pickable=True,
+        )
+        tooltip = {"text": "{elevationValue} site(s)"}
+    else:
+        layer = pdk.Layer(
+            "ScatterplotLayer",
+            data=map_df,
+            get_position=["longitude", "latitude"],
+            get_radius=50,
+            radius_min_pixels=4,
+            get_fill_color=[31, 119, 180, 200],
+            pickable=True,
+        )
+        tooltip = {"text": "{site_name}"} if "site_name" in map_df.columns else None
+    return pdk.Deck(layers=[layer], initial_view_state=view_state, tooltip=tooltip)
+
+
+@st.cache_resource(show_spinner=False)
+def build_timeline_chart(chart_df: "pd.DataFrame", y_col: str, y_title: Optional[str],
+                         tooltip_cols: List[str], bar_size: int):
+    """Build the Altair timeline chart once per timeline table."""
+    import altair as alt
+
+    # Only ship the encoded columns, at most TIMELINE_MAX_ROWS of them
+    columns = list(dict.fromkeys([y_col, "start_year", "end_year", *tooltip_cols]))
+    data = chart_df[columns]
+    if len(data) > TIMELINE_MAX_ROWS:
+        data = data.sample(n=TIMELINE_MAX_ROWS, random_state=0).sort_index()
+    if data[["start_year", "end_year"]].notna().all(axis=None):
+        data = data.astype({"start_year": "int32", "end_year": "int32"})
+
+    y_kwargs = {"sort": "-x"}
+    if y_title:
+        y_kwargs["title"] = y_title
+    return (
+        alt.Chart(data)
+        .encode(
+            x="start_year:Q",
+            x2="end_year:Q",
+            y=alt.Y(f"{y_col}:N", **y_kwargs),
+            tooltip=tooltip_cols,
+        )
+        .mark_bar(size=bar_size, color="#1f77b4")
+    )
+
+
+@st.cache_data(show_spinner=False)
+def _clean_timeline(df_time: "pd.DataFrame") -> "pd.DataFrame":
+    """Coerce uploaded start/end years to numbers and drop rows without a start year."""
+    import pandas as pd
+
+    end_year = df_time["end_year"] if "end_year" in df_time.columns else df_time["start_year"]
+    return df_time.assign(
+        start_year=pd.to_numeric(df_time["start_year"], errors="coerce"),
+        end_year=pd.to_numeric(end_year, errors="coerce"),
+    ).dropna(subset=["start_year"])
+
+
+@st.fragment
 def _render_visualisations_tab():
     """Maps, timelines, and simple relationship views from tabular data."""
+    import pandas as pd
+
     st.subheader("🌍 Interactive Site Map")
     st.caption(
         "If your PDF contains coordinates, the map will be pre-populated automatically. "
@@ -540,7 +1317,7 @@ def _render_visualisations_tab():
         if "site_name" in auto_sites_df.columns:
             # Add site_name as a column for better display
             map_df["site_name"] = auto_sites_df["site_name"].fillna("Unnamed Site")
-        st.map(map_df)
+        st.pydeck_chart(build_site_deck(map_df))
         with st.expander("View extracted site coordinates"):
             # Show site_name prominently if available
             display_cols = ["latitude", "longitude"]
@@ -558,7 +1335,10 @@ def _render_visualisations_tab():
         required_cols = {"latitude", "longitude"}
         if required_cols.issubset(df_sites.columns):
             st.markdown("**From uploaded CSV:**")
-            st.map(df_sites[["latitude", "longitude"]])
+            map_cols = ["latitude", "longitude"]
+            if "site_name" in df_sites.columns:
+                map_cols.append("site_name")
+            st.pydeck_chart(build_site_deck(df_sites[map_cols].dropna(subset=["latitude", "longitude"])))
             with st.expander("View uploaded site table"):
                 st.dataframe(df_sites, use_container_width=True)
         else:
@@ -578,8 +1358,6 @@ def _render_visualisations_tab():
     if auto_time_df is not None and not auto_time_df.empty:
         st.markdown("**Automatically extracted from PDF (labelled by context):**")
         try:
-            import altair as alt
-
             # Use site_name if available, otherwise use label
             if "site_name" in auto_time_df.columns:
                 y_col = "site_name"
@@ -589,21 +1367,14 @@ def _render_visualisations_tab():
                 tooltip_cols = ["label", "start_year", "end_year", "context"]
             
             # Filter out None site_names for cleaner display
-            chart_df = auto_time_df.copy()
+            chart_df = auto_time_df
             if "site_name" in chart_df.columns:
-                chart_df = chart_df[chart_df["site_name"].notna() | chart_df["label"].notna()]
-
-            auto_chart = (
-                alt.Chart(chart_df)
-                .encode(
-                    x="start_year:Q",
-                    x2="end_year:Q",
-                    y=alt.Y(f"{y_col}:N", sort="-x", title="Site/Period"),
-                    tooltip=tooltip_cols,
-                )
-                .mark_bar(size=10, color="#1f77b4")
-            )
+                chart_df = chart_df.loc[chart_df["site_name"].notna() | chart_df["label"].notna()]
+
+            auto_chart = build_timeline_chart(chart_df, y_col, "Site/Period", tooltip_cols, 10)
             st.altair_chart(auto_chart, use_container_width=True)
+            if len(chart_df) > TIMELINE_MAX_ROWS:
+                st.caption(f"Showing a sample of {TIMELINE_MAX_ROWS} of {len(chart_df)} timeline entries.")
         except Exception as e:  # pragma: no cover
             st.error(f"Could not render automatic timeline chart: {e}")
             st.dataframe(auto_time_df)
@@ -614,23 +1385,15 @@ def _render_visualisations_tab():
     if timeline_file is not None:
         df_time = pd.read_csv(timeline_file)
         if {"site_name", "start_year"}.issubset(df_time.columns):
-            # Normalise years
-            df_time["end_year"] = df_time.get("end_year", df_time["start_year"])
-            df_time["start_year"] = pd.to_numeric(df_time["start_year"], errors="coerce")
-            df_time["end_year"] = pd.to_numeric(df_time["end_year"], errors="coerce")
-            df_time = df_time.dropna(subset=["start_year"])
+            df_time = _clean_timeline(df_time)
             if not df_time.empty:
                 try:
-                    import altair as alt
-
-                    base = alt.Chart(df_time).encode(
-                        x="start_year:Q",
-                        x2="end_year:Q",
-                        y=alt.Y("site_name:N", sort="-x"),
-                        tooltip=["site_name", "start_year", "end_year"],
+                    timeline = build_timeline_chart(
+                        df_time, "site_name", None, ["site_name", "start_year", "end_year"], 12
                     )
-                    timeline = base.mark_bar(size=12, color="#1f77b4")
                     st.altair_chart(timeline, use_container_width=True)
+                    if len(df_time) > TIMELINE_MAX_ROWS:
+                        st.caption(f"Showing a sample of {TIMELINE_MAX_ROWS} of {len(df_time)} timeline rows.")
                 except Exception as e:  # pragma: no cover
                     st.error(f"Could not render timeline chart: {e}")
                     st.dataframe(df_time)
@@ -667,6 +1430,7 @@ def _render_visualisations_tab():
     )
 
 
+@st.fragment
 def _render_docs_glossary_tab():
     """Document‑oriented tools: source snippets, glossary, and highlighting helper."""
     st.subheader("📄 Document & Source Viewer")
@@ -691,24 +1455,101 @@ def _render_docs_glossary_tab():
     st.markdown("---")
     st.subheader("📘 Archaeological Terminology Glossary")
 
-    glossary = {
-        "Context": "A discrete unit of stratigraphy representing a single event of deposition or cut.",
-        "Stratigraphy": "The study and recording of layered deposits and their relationships over time.",
-        "Feature": "A non-portable archaeological element such as a pit, ditch, wall, or hearth.",
-        "Assemblage": "A group of artifacts found together in the same context, interpreted as related.",
-        "Phase": "A group of contexts interpreted as belonging to the same broad period of activity.",
-        "Datum": "A fixed reference point used for surveying and recording elevations.",
-        "Transect": "A systematic survey line or corridor walked during field survey.",
-    }
-
-    term = st.selectbox("Look up a term:", sorted(glossary.keys()))
-    st.write(f"**{term}**: {glossary[term]}")
+    term = st.selectbox("Look up a term:", sorted(GLOSSARY.keys()))
+    st.write(f"**{term}**: {GLOSSARY[term]}")
 
     with st.expander("Show full glossary"):
-        for k, v in glossary.items():
-            st.markdown(f"- **{k}**: {v}")
+        st.markdown(_glossary_markdown())
+
+
+_PERMIT_PROMPT = Template(
+    "You are an archaeological regulatory assistant. "
+    "Based on the following project description, outline likely permit "
+    "requirements, responsible authorities, and key legal considerations. "
+    "Use bullet points and clearly mark any assumptions.\n\n"
+    "Project description:\n$notes"
+)
+_REPORT_PROMPT = Template(
+    "Generate a structured archaeological compliance report template. "
+    "Use headings and bullet points. Tailor it to the following project context:\n\n"
+    "$context"
+)
+_METHODOLOGY_PROMPT = Template(
+    "Create a detailed survey methodology template for this project, "
+    "including sampling strategy, recording system, and data management:\n\n"
+    "$context"
+)
+_CITATION_PROMPT = Template(
+    "Format the following bibliographic details as a $style style citation. "
+    "If information is missing, clearly mark it with placeholders:\n\n"
+    "$info"
+)
+
+
+def _permit_prompt(permit_notes: str) -> str:
+    """Prompt for the permit requirement checklist tool."""
+    return _PERMIT_PROMPT.substitute(notes=permit_notes)
+
+
+def _report_prompt(report_context: str) -> str:
+    """Prompt for the reporting template tool."""
+    return _REPORT_PROMPT.substitute(context=report_context)
+
+
+def _methodology_prompt(meth_context: str) -> str:
+    """Prompt for the survey methodology template tool."""
+    return _METHODOLOGY_PROMPT.substitute(context=meth_context)
+
+
+def _citation_prompt(style: str, citation_info: str) -> str:
+    """Prompt for the citation formatting tool."""
+    return _CITATION_PROMPT.substitute(style=style, info=citation_info)
+
+
+def _require_rag(fn):
+    """Skip a tool action with the usual error when no RAG chain is ready."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not _rag_ready():
+            st.error("Please process a PDF first so the assistant has context.")
+            return None
+        return fn(*args, **kwargs)
+    return wrapper
+
+
+@_require_rag
+def _submit_tool_queries(prompts: Dict[str, str]) -> List[str]:
+    """Start a background query per compliance tool; returns the job keys started."""
+    for job_key, prompt in prompts.items():
+        submit_query(job_key, prompt, mode="Compliance & Templates")
+    return list(prompts)
+
+
+def _report_generator() -> "ReportGenerator":
+    """Session's report generator, created on first use and kept on the current RAG chain."""
+    from report_generator import ReportGenerator
+
+    if 'report_generator' not in st.session_state:
+        st.session_state.report_generator = ReportGenerator()
+    if _rag_ready():
+        st.session_state.report_generator.rag_chain = st.session_state.rag_chain
+    return st.session_state.report_generator
+
+
+@st.cache_data(show_spinner=False, ttl=ANSWER_CACHE_TTL_SECONDS, max_entries=64)
+def _generate_report(_generator: "ReportGenerator", store_key: Optional[str], report_type: str,
+                     project_json: str) -> str:
+    """
+    Generate a report once per vector store, report type and project data.
+
+    The generator's RAG analysis makes an LLM call per report, so clicking
+    Generate again with unchanged inputs returns the earlier report.
+    project_json is the canonical (key-sorted) JSON of the project data.
+    """
+    return _generator.generate_report(report_type, json.loads(project_json))
 
 
+@st.fragment
 def _render_compliance_tools_tab():
     """Regulatory, methodology, reporting, and citation helpers (prompt-based)."""
     st.subheader("⚖️ Regulatory & Compliance Helper")
@@ -725,23 +1566,12 @@ def _render_compliance_tools_tab():
             placeholder="e.g. fieldwalking survey near a river in [region], with planned shovel test pits...",
             height=120,
         )
-        if st.button("Generate permit requirement checklist") and permit_notes:
-            if not (
-                st.session_state.vector_store_initialized
-                and st.session_state.rag_chain
-            ):
-                st.error("Please process a PDF first so the assistant has context.")
+        if st.button("Generate permit requirement checklist"):
+            if permit_notes.strip():
+                _submit_tool_queries({"permits": _permit_prompt(permit_notes)})
             else:
-                with st.spinner("Checking likely permits and legal steps..."):
-                    prompt = (
-                        "You are an archaeological regulatory assistant. "
-                        "Based on the following project description, outline likely permit "
-                        "requirements, responsible authorities, and key legal considerations. "
-                        "Use bullet points and clearly mark any assumptions.\n\n"
-                        f"Project description:\n{permit_notes}"
-                    )
-                    result = st.session_state.rag_chain.query(prompt)
-                    st.markdown(result["answer"])
+                st.warning("Please describe your project first.")
+        render_query_job("permits")
 
     with col2:
         report_context = st.text_area(
@@ -750,60 +1580,82 @@ def _render_compliance_tools_tab():
             height=120,
         )
         if st.button("Draft reporting template / outline"):
-            if not (
-                st.session_state.vector_store_initialized
-                and st.session_state.rag_chain
-            ):
-                st.error("Please process a PDF first so the assistant has context.")
+            if report_context.strip():
+                _submit_tool_queries({"report_outline": _report_prompt(report_context)})
             else:
-                with st.spinner("Drafting a structured report outline..."):
-                    prompt = (
-                        "Generate a structured archaeological compliance report template. "
-                        "Use headings and bullet points. Tailor it to the following project context:\n\n"
-                        f"{report_context}"
-                    )
-                    result = st.session_state.rag_chain.query(prompt)
-                    st.markdown(result["answer"])
+                st.warning("Please provide your project details first.")
+        render_query_job("report_outline")
 
     st.markdown("---")
-    st.subheader("📝 Survey Methodology Template")
-    meth_context = st.text_area(
-        "Survey parameters (environment, aims, constraints)",
-        placeholder="e.g. intensive pedestrian survey over 5 km² of agricultural land...",
-        height=120,
-    )
-    if st.button("Generate methodology template"):
-        if not (
-            st.session_state.vector_store_initialized and st.session_state.rag_chain
-        ):
-            st.error("Please process a PDF first so the assistant has context.")
+    # One form for both tools: typing or changing the style does not rerun the
+    # tab, and the "all" button always sees both current inputs
+    with st.form("methodology_citation_form"):
+        st.subheader("📝 Survey Methodology Template")
+        meth_context = st.text_area(
+            "Survey parameters (environment, aims, constraints)",
+            placeholder="e.g. intensive pedestrian survey over 5 km² of agricultural land...",
+            height=120,
+        )
+
+        st.subheader("📚 Citation Generator")
+        citation_info = st.text_area(
+            "Enter bibliographic details (author, year, title, publisher, etc.)",
+            placeholder="e.g. Renfrew, C. and Bahn, P. 2016. Archaeology: Theories, Methods and Practice. London: Thames & Hudson.",
+            height=120,
+        )
+        style = st.selectbox(
+            "Preferred style", ["Harvard", "Chicago", "APA", "Custom archaeological"], index=0
+        )
+
+        meth_col, cite_col, all_col = st.columns(3)
+        with meth_col:
+            methodology_submitted = st.form_submit_button("Generate methodology template")
+        with cite_col:
+            citation_submitted = st.form_submit_button("Format citation")
+        with all_col:
+            all_submitted = st.form_submit_button(
+                "Generate all filled-in tools",
+                help="Runs every tool on this tab that has input, concurrently",
+            )
+
+    # Empty inputs are refused here rather than spending an LLM call on them
+    if methodology_submitted:
+        if meth_context.strip():
+            _submit_tool_queries({"methodology": _methodology_prompt(meth_context)})
         else:
-            with st.spinner("Building a methodology template..."):
-                prompt = (
-                    "Create a detailed survey methodology template for this project, "
-                    "including sampling strategy, recording system, and data management:\n\n"
-                    f"{meth_context}"
-                )
-                result = st.session_state.rag_chain.query(prompt)
-                st.markdown(result["answer"])
+            st.warning("Please provide the survey parameters first.")
+    elif citation_submitted:
+        if citation_info.strip():
+            _submit_tool_queries({"citation": _citation_prompt(style, citation_info)})
+        else:
+            st.warning("Please enter the bibliographic details first.")
+    elif all_submitted:
+        # One background job per filled-in tool: the query pool runs them
+        # concurrently and each answer streams into its own section
+        prompts = {
+            "permits": permit_notes.strip() and _permit_prompt(permit_notes),
+            "report_outline": report_context.strip() and _report_prompt(report_context),
+            "methodology": meth_context.strip() and _methodology_prompt(meth_context),
+            "citation": citation_info.strip() and _citation_prompt(style, citation_info),
+        }
+        prompts = {job_key: prompt for job_key, prompt in prompts.items() if prompt}
+        if not prompts:
+            st.warning("Fill in at least one of the tools above first.")
+        elif _submit_tool_queries(prompts):
+            # The permit and report sections were drawn above; redraw them
+            st.rerun()
+    render_query_job("methodology")
+    render_query_job("citation")
 
     st.markdown("---")
     st.subheader("📝 Report Generator")
     
-    # Initialize report generator
-    if 'report_generator' not in st.session_state:
-        st.session_state.report_generator = ReportGenerator(
-            rag_chain=st.session_state.rag_chain if st.session_state.vector_store_initialized else None
-        )
-    else:
-        # Update RAG chain if available
-        if st.session_state.vector_store_initialized:
-            st.session_state.report_generator.rag_chain = st.session_state.rag_chain
-    
+    from report_generator import ReportGenerator
+
     report_type = st.selectbox(
         "Report Type",
-        options=list(ReportGenerator.REPORT_TYPES.keys()),
-        format_func=lambda x: ReportGenerator.REPORT_TYPES[x],
+        options=tuple(ReportGenerator.REPORT_TYPES),
+        format_func=ReportGenerator.REPORT_TYPES.__getitem__,
         key="report_type_select"
     )
     
@@ -819,12 +1671,22 @@ def _render_compliance_tools_tab():
     col1, col2 = st.columns(2)
     with col1:
         if st.button("📄 Generate Report", use_container_width=True, key="generate_report_btn"):
-            with st.spinner("Generating report..."):
-                report_content = st.session_state.report_generator.generate_report(
-                    report_type, project_data
-                )
-                st.session_state.generated_report = report_content
-                st.session_state.report_type_generated = report_type
+            # Generated in the background so the other tabs stay usable meanwhile
+            st.session_state.pop('generated_report', None)
+            st.session_state.report_type_generated = report_type
+            submit_job(
+                "report",
+                _generate_report,
+                _report_generator(),
+                st.session_state.rag_store_key if _rag_ready() else None,
+                report_type,
+                json.dumps(project_data, sort_keys=True, default=str),
+                render=_show_report_preview,
+            )
+    report_job = st.session_state.query_jobs.get("report")
+    if (report_job and report_job["future"].done() and not report_job["future"].exception()
+            and 'generated_report' not in st.session_state):
+        st.session_state.generated_report = report_job["future"].result()
     
     with col2:
         if st.button("💾 Export Report", use_container_width=True, key="export_report_btn", disabled='generated_report' not in st.session_state):
@@ -838,38 +1700,77 @@ def _render_compliance_tools_tab():
                     key="download_report_btn"
                 )
     
-    if 'generated_report' in st.session_state:
-        st.markdown("### Generated Report Preview")
-        st.markdown(st.session_state.generated_report)
-    
-    st.markdown("---")
-    st.subheader("📚 Citation Generator")
-    citation_info = st.text_area(
-        "Enter bibliographic details (author, year, title, publisher, etc.)",
-        placeholder="e.g. Renfrew, C. and Bahn, P. 2016. Archaeology: Theories, Methods and Practice. London: Thames & Hudson.",
-        height=120,
-    )
-    style = st.selectbox(
-        "Preferred style", ["Harvard", "Chicago", "APA", "Custom archaeological"], index=0
-    )
-    if st.button("Format citation"):
-        if not (
-            st.session_state.vector_store_initialized and st.session_state.rag_chain
-        ):
-            st.error("Please process a PDF first so the assistant has context.")
-        else:
-            with st.spinner("Formatting citation..."):
-                prompt = (
-                    f"Format the following bibliographic details as a {style} style citation. "
-                    f"If information is missing, clearly mark it with placeholders:\n\n"
-                    f"{citation_info}"
-                )
-                result = st.session_state.rag_chain.query(prompt)
-                st.markdown(result["answer"])
+    render_query_job("report")
+
+
+def _show_report_preview(report_content: str):
+    """Render a finished report job."""
+    st.markdown("### Generated Report Preview")
+    st.markdown(report_content)
+
+
+@st.cache_data(show_spinner=False, max_entries=512)
+def _photo_thumbnail(file_path: str, mtime_ns: int) -> bytes:
+    """
+    WEBP thumbnail of a dig photo; mtime_ns invalidates it when the file changes.
+
+    Image.thumbnail lets the JPEG decoder downscale while decoding, so large
+    photos are never fully decoded, and the browser gets a few KB per photo.
+    """
+    from PIL import Image
+
+    with Image.open(file_path) as img:
+        return _encode_webp(img, PHOTO_THUMBNAIL_SIZE)
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _upload_preview(file_id: str, _image: "Image.Image") -> bytes:
+    """
+    WEBP preview of an uploaded artifact photo, keyed by the upload's file_id.
+
+    Passing the PIL image to st.image would send it as a PNG up to 1460 px wide.
+    """
+    return _encode_webp(_image.copy(), UPLOAD_PREVIEW_SIZE)
+
+
+def _encode_webp(img: "Image.Image", size: int) -> bytes:
+    """Shrink img in place to fit size x size and encode it as WEBP."""
+    import io
 
+    img.thumbnail((size, size))
+    if img.mode not in ("RGB", "RGBA"):
+        img = img.convert("RGB")
+    buffer = io.BytesIO()
+    img.save(buffer, "WEBP", quality=80)
+    return buffer.getvalue()
 
+
+def _save_photo_uploads(uploaded_files: List, target_dir: Path):
+    """
+    Write uploaded photos to target_dir on a few threads, skipping identical files.
+
+    A file is skipped only if one with the same name and content is already
+    saved, which keeps its mtime (and so its cached perceptual hash); a
+    different photo with the same name and size is still written.
+    """
+    def save(uploaded_file):
+        path = target_dir / uploaded_file.name
+        content = uploaded_file.getbuffer()
+        if (path.exists() and path.stat().st_size == uploaded_file.size
+                and path.read_bytes() == content):
+            return
+        path.write_bytes(content)
+
+    with ThreadPoolExecutor(max_workers=8, thread_name_prefix="photo-upload") as executor:
+        # list() re-raises the first failed write
+        list(executor.map(save, uploaded_files))
+
+
+@st.fragment
 def _render_photo_organizer_tab():
     """Dig Photo Organizer - auto-organize photos by trench/locus, artifact types, etc."""
+    from photo_organizer import PhotoOrganizer
+
     st.subheader("📸 Dig Photo Organizer")
     st.caption(
         "Upload or select a directory of dig photos to automatically organize them by trench, locus, "
@@ -903,17 +1804,18 @@ def _render_photo_organizer_tab():
             accept_multiple_files=True,
             help="Upload multiple photos to organize"
         )
-        if uploaded_files:
+        upload_ids = tuple(uploaded_file.file_id for uploaded_file in uploaded_files or ())
+        # Every rerun of this tab hands back the same uploads; save and scan only when they change
+        if uploaded_files and st.session_state.get("photo_upload_ids") != upload_ids:
             # Create temporary directory and save files
             temp_dir = Path("./temp_photos")
             temp_dir.mkdir(exist_ok=True)
-            for uploaded_file in uploaded_files:
-                with open(temp_dir / uploaded_file.name, "wb") as f:
-                    f.write(uploaded_file.getbuffer())
+            _save_photo_uploads(uploaded_files, temp_dir)
             try:
                 organizer = PhotoOrganizer(str(temp_dir))
                 photos = organizer.scan_directory()
                 st.session_state.photo_organizer = organizer
+                st.session_state.photo_upload_ids = upload_ids
                 st.success(f"Processed {len(photos)} photos!")
             except Exception as e:
                 st.error(f"Error processing photos: {e}")
@@ -949,8 +1851,10 @@ def _render_photo_organizer_tab():
                 for idx, photo in enumerate(photos[:12]):  # Show first 12
                     with cols[idx % 4]:
                         try:
-                            img = Image.open(photo['file_path'])
-                            st.image(img, use_container_width=True, caption=photo['file_name'])
+                            thumbnail = _photo_thumbnail(
+                                photo['file_path'], os.stat(photo['file_path']).st_mtime_ns
+                            )
+                            st.image(thumbnail, use_container_width=True, caption=photo['file_name'])
                         except:
                             st.text(photo['file_name'])
         
@@ -985,29 +1889,83 @@ def _render_photo_organizer_tab():
         # Statistics
         with st.expander("📈 Statistics"):
             stats = organizer.get_statistics()
-            st.json(stats)
+            st.json(encode_json(stats, indent=False).decode())
+
+
+def _artifact_assessor():
+    """Session's artifact assessor, created on first use and kept on the current RAG chain."""
+    from artifact_assessment import ArtifactAssessment
+
+    if st.session_state.artifact_assessor is None:
+        st.session_state.artifact_assessor = ArtifactAssessment()
+    if _rag_ready():
+        st.session_state.artifact_assessor.rag_chain = st.session_state.rag_chain
+    return st.session_state.artifact_assessor
+
+
+# Answer cache scope of artifact assessments, apart from the chat modes
+ASSESSMENT_CACHE_SCOPE = "Artifact Assessment"
+
+
+def submit_assessment(job_key: str, run_assessment, render_summary):
+    """
+    Run an artifact assessment in the background under job_key.
+
+    The detailed assessment is looked up by exact prompt in its own answer
+    cache scope (not the chat mode's) and, on a miss, streams into the job so
+    render_query_job shows it while it generates.
+
+    Args:
+        job_key: Session key of the job
+        run_assessment: Called with an answer_fn (or None without a RAG chain);
+            runs the assessor and returns its assessment dict
+        render_summary: Draws the input summary for an assessment
+    """
+    rag_chain = st.session_state.rag_chain if _rag_ready() else None
+    chunks: List[str] = []
+
+    def answer_fn(prompt: str) -> dict:
+        cache, vector, result = _semantic_cache_lookup(prompt, mode=ASSESSMENT_CACHE_SCOPE)
+        if result is None:
+            return _run_query_job(rag_chain, cache, prompt, vector, chunks)
+        chunks.append(result["answer"])
+        return result
+
+    submit_job(
+        job_key,
+        run_assessment,
+        answer_fn if rag_chain is not None else None,
+        render=functools.partial(_show_assessment, render_summary=render_summary),
+        chunks=chunks,
+    )
+
 
+def _show_assessment(assessment: Dict, render_summary):
+    """Render a finished artifact assessment."""
+    st.markdown("### Assessment Results")
+    render_summary(assessment)
 
+    if assessment.get('detailed_analysis'):
+        st.markdown("#### Detailed Assessment")
+        st.markdown(assessment['detailed_analysis'])
+    if assessment.get('sources'):
+        _render_sources(st.session_state.rag_chain.get_sources(assessment['sources']))
+
+    st.markdown("#### Recommendations")
+    st.markdown("\n".join(f"- {rec}" for rec in assessment.get('recommendations', [])))
+
+
+@st.fragment
 def _render_found_something_tab():
     """Found Something? - Artifact assessment with photo upload and text description."""
+    from PIL import Image
+
     st.subheader("🔍 Found Something?")
     st.caption(
         "Upload a photo or describe what you found. Get expert assessment, identification help, "
         "and recommendations for next steps."
     )
     
-    # Initialize artifact assessor if not exists
-    if st.session_state.artifact_assessor is None:
-        st.session_state.artifact_assessor = ArtifactAssessment(
-            rag_chain=st.session_state.rag_chain if st.session_state.vector_store_initialized else None
-        )
-    
-    assessor = st.session_state.artifact_assessor
-    
-    # Update RAG chain if available
-    if st.session_state.vector_store_initialized and st.session_state.rag_chain:
-        assessor.rag_chain = st.session_state.rag_chain
-    
     input_method = st.radio(
         "How would you like to submit your find?",
         ["📷 Photo Upload", "✍️ Text Description"],
@@ -1026,7 +1984,7 @@ def _render_found_something_tab():
         
         if uploaded_image:
             image = Image.open(uploaded_image)
-            st.image(image, caption="Uploaded Image", width=400)
+            st.image(_upload_preview(uploaded_image.file_id, image), caption="Uploaded Image", width=400)
             
             # Optional context
             with st.expander("Add Context (Optional)"):
@@ -1039,34 +1997,30 @@ def _render_found_something_tab():
                 context = {k: v for k, v in context.items() if v and v != 'unknown'}
             
             if st.button("🔍 Assess Artifact", use_container_width=True):
-                with st.spinner("Analyzing artifact..."):
-                    assessment = assessor.assess_from_photo(image, context if 'context' in locals() else None)
-                    
-                    st.markdown("### Assessment Results")
-                    
-                    # Basic analysis
+                photo_context = context if 'context' in locals() else None
+                # Image.open is lazy; decode now so the worker never reads the
+                # upload buffer that later reruns reopen and seek
+                photo = image.copy()
+
+                def render_image_analysis(assessment: Dict):
                     st.markdown("#### Image Analysis")
-                    st.json(assessment['analysis'])
-                    
-                    # Detailed assessment
-                    if assessment.get('detailed_analysis'):
-                        st.markdown("#### Detailed Assessment")
-                        st.markdown(assessment['detailed_analysis'])
-                        
-                        if assessment.get('sources'):
-                            with st.expander("📖 View Sources"):
-                                for source in assessment['sources'][:3]:
-                                    st.text(source.get('content', '')[:500])
-                    
-                    # Recommendations
-                    st.markdown("#### Recommendations")
-                    for rec in assessment.get('recommendations', []):
-                        st.markdown(f"- {rec}")
+                    st.json(encode_json(assessment['analysis'], indent=False).decode())
+
+                assessor = _artifact_assessor()
+                submit_assessment(
+                    "assessment_photo",
+                    lambda answer_fn: assessor.assess_from_photo(
+                        photo, photo_context, answer_fn=answer_fn
+                    ),
+                    render_image_analysis,
+                )
+            render_query_job("assessment_photo")
     
     else:  # Text Description
         st.markdown("### Option B: Text Description")
         st.caption("Answer the guided questions to describe what you found")
         
+        assessor = _artifact_assessor()
         template = assessor.get_guided_questions_template()
         description = {}
         
@@ -1106,33 +2060,27 @@ def _render_found_something_tab():
         )
         
         if st.button("🔍 Assess Artifact", use_container_width=True):
-            with st.spinner("Analyzing artifact description..."):
-                assessment = assessor.assess_from_text(description, st.session_state.rag_chain if st.session_state.vector_store_initialized else None)
-                
-                st.markdown("### Assessment Results")
-                
-                # Description summary
+            def render_description(assessment: Dict):
                 st.markdown("#### Your Description")
                 st.markdown(assessment['analysis'].get('full_description', ''))
-                
-                # Detailed assessment
-                if assessment.get('detailed_analysis'):
-                    st.markdown("#### Detailed Assessment")
-                    st.markdown(assessment['detailed_analysis'])
-                    
-                    if assessment.get('sources'):
-                        with st.expander("📖 View Sources"):
-                            for source in assessment['sources'][:3]:
-                                st.text(source.get('content', '')[:500])
-                
-                # Recommendations
-                st.markdown("#### Recommendations")
-                for rec in assessment.get('recommendations', []):
-                    st.markdown(f"- {rec}")
+
+            rag_chain = st.session_state.rag_chain if _rag_ready() else None
+            submit_assessment(
+                "assessment_text",
+                lambda answer_fn: assessor.assess_from_text(
+                    description, rag_chain, answer_fn=answer_fn
+                ),
+                render_description,
+            )
+        render_query_job("assessment_text")
 
 
 def main():
     """Main application entry point."""
+    # Load the embedding model while the user reads the landing page
+    if WARMUP_ON_START:
+        start_embedding_warmup(EMBEDDING_MODEL)
+    enable_llm_cache()
     initialize_session_state()
 
     _render_sidebar()
@@ -1148,6 +2096,8 @@ def main():
         ]
     )
 
+    # Every tab body is drawn on each full run (st.tabs has no lazy mode), so
+    # the non-chat tabs are fragments: interacting with one reruns only it
     with chat_tab:
         _render_chat_tab()
     
@@ -3,25 +3,79 @@ Artifact Assessment Module
 Handles "Found Something?" feature with photo upload and text description inputs
 """
 
+import hashlib
 import os
-from typing import Dict, Optional, List
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, List
+import numpy as np
 from PIL import Image
 import base64
 from io import BytesIO
 import logging
 
+try:
+    from sklearn.cluster import MiniBatchKMeans  # optional: k-means dominant colours
+except ImportError:
+    MiniBatchKMeans = None
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Guided questions for text descriptions; shared by every caller, who must not modify it
+_GUIDED_QUESTIONS = {
+    'material': {
+        'question': 'What material is it?',
+        'options': ['stone', 'metal', 'pottery', 'bone', 'glass', 'organic', 'other'],
+        'required': True,
+    },
+    'size': {
+        'question': 'How big is it?',
+        'options': ['coin-sized', 'hand-sized', 'larger', 'very large'],
+        'required': True,
+    },
+    'location': {
+        'question': 'Where did you find it?',
+        'options': ['garden', 'construction site', 'beach', 'field', 'archaeological site', 'other'],
+        'required': True,
+    },
+    'markings': {
+        'question': 'Any markings or decorations?',
+        'options': None,  # Free text
+        'required': False,
+    },
+    'additional_notes': {
+        'question': 'Additional notes or observations',
+        'options': None,  # Free text
+        'required': False,
+    },
+}
+
 
 class ArtifactAssessment:
     """Assesses archaeological artifacts from photos or text descriptions."""
     
+    # Photos are shrunk to fit this before colour analysis instead of counting
+    # every pixel of a 12 MP original
+    preferred_input_size = (256, 256)
+    # Pixels clustered when finding dominant colours with k-means
+    color_sample_pixels = 10000
+    # Encoded images kept by image_to_base64, least recently used dropped first
+    base64_cache_size = 32
+    
     def __init__(self, rag_chain=None):
         self.rag_chain = rag_chain
+        # image_to_base64 results by (mode, size, digest of the pixel data)
+        self._b64_cache: "OrderedDict[tuple, str]" = OrderedDict()
+        
+    def assess_from_photo(self, image: Image.Image, context: Optional[Dict] = None,
+                          answer_fn: Optional[Callable[[str], Dict]] = None) -> Dict:
+        """
+        Assess artifact from uploaded photo.
         
-    def assess_from_photo(self, image: Image.Image, context: Optional[Dict] = None) -> Dict:
-        """Assess artifact from uploaded photo."""
+        answer_fn, if given, answers the RAG prompt in place of rag_chain.query
+        (e.g. streaming it to the UI) and returns the same result dict.
+        """
+        width, height = image.size
         assessment = {
             'input_type': 'photo',
             'image_size': image.size,
@@ -33,16 +87,24 @@ class ArtifactAssessment:
         # Extract basic image features
         assessment['analysis']['dimensions'] = image.size
         assessment['analysis']['color_mode'] = image.mode
-        assessment['analysis']['file_size_estimate'] = len(image.tobytes())
+        # Decoded size, computed rather than materialised with tobytes()
+        assessment['analysis']['file_size_estimate'] = width * height * len(image.getbands())
         
         # Basic color analysis
         if image.mode == 'RGB':
-            pixels = list(image.getdata())
-            assessment['analysis']['dominant_colors'] = self._get_dominant_colors(pixels, k=3)
+            # Resized straight from the original rather than thumbnail() on a
+            # copy, so a 24 MP photo is never duplicated at full size
+            max_width, max_height = self.preferred_input_size
+            scale = min(1.0, max_width / width, max_height / height)
+            sample = image.resize(
+                (max(1, round(width * scale)), max(1, round(height * scale))),
+                Image.Resampling.BILINEAR, reducing_gap=2.0,
+            ) if scale < 1.0 else image
+            assessment['analysis']['dominant_colors'] = self._get_dominant_colors(np.asarray(sample), k=3)
         
         # Shape analysis (simplified - could be enhanced with CV)
-        assessment['analysis']['aspect_ratio'] = image.size[0] / image.size[1] if image.size[1] > 0 else 1.0
-        assessment['analysis']['orientation'] = 'landscape' if image.size[0] > image.size[1] else 'portrait' if image.size[1] > image.size[0] else 'square'
+        assessment['analysis']['aspect_ratio'] = width / height if height > 0 else 1.0
+        assessment['analysis']['orientation'] = 'landscape' if width > height else 'portrait' if height > width else 'square'
         
         # Generate assessment text for RAG
         if self.rag_chain:
@@ -52,7 +114,7 @@ class ArtifactAssessment:
             # Use RAG chain for detailed analysis
             prompt = self._build_assessment_prompt(assessment_text, context)
             try:
-                result = self.rag_chain.query(prompt)
+                result = (answer_fn or self.rag_chain.query)(prompt)
                 assessment['detailed_analysis'] = result.get('answer', '')
                 assessment['sources'] = result.get('source_documents', [])
             except Exception as e:
@@ -66,8 +128,9 @@ class ArtifactAssessment:
         
         return assessment
     
-    def assess_from_text(self, description: Dict, rag_chain=None) -> Dict:
-        """Assess artifact from text description with guided questions."""
+    def assess_from_text(self, description: Dict, rag_chain=None,
+                         answer_fn: Optional[Callable[[str], Dict]] = None) -> Dict:
+        """Assess artifact from text description with guided questions (answer_fn as for assess_from_photo)."""
         assessment = {
             'input_type': 'text',
             'description': description,
@@ -84,7 +147,7 @@ class ArtifactAssessment:
             chain = rag_chain or self.rag_chain
             prompt = self._build_assessment_prompt(full_description, description)
             try:
-                result = chain.query(prompt)
+                result = (answer_fn or chain.query)(prompt)
                 assessment['detailed_analysis'] = result.get('answer', '')
                 assessment['sources'] = result.get('source_documents', [])
             except Exception as e:
@@ -98,21 +161,45 @@ class ArtifactAssessment:
         
         return assessment
     
-    def _get_dominant_colors(self, pixels: List, k: int = 3) -> List[Dict]:
-        """Get dominant colors from image (simplified version)."""
-        # Simple color extraction - for production, consider using clustering (KMeans)
-        color_counts = {}
-        sample_size = min(1000, len(pixels))
-        
-        for pixel in pixels[:sample_size]:
-            if isinstance(pixel, tuple) and len(pixel) >= 3:
-                # Quantize colors to reduce complexity
-                quantized = tuple((p // 32) * 32 for p in pixel[:3])
-                color_counts[quantized] = color_counts.get(quantized, 0) + 1
-        
-        # Sort by frequency and return top k
-        sorted_colors = sorted(color_counts.items(), key=lambda x: x[1], reverse=True)
-        return [{'rgb': color, 'frequency': count} for color, count in sorted_colors[:k]]
+    def _get_dominant_colors(self, pixels: np.ndarray, k: int = 3) -> List[Dict]:
+        """
+        Get dominant colors from an RGB pixel array.
+        
+        Clusters a random sample of pixels with mini-batch k-means when
+        scikit-learn is installed, otherwise counts 8-level quantized colours.
+        Frequencies are pixel counts within the sample or the whole array.
+        """
+        rgb = pixels.reshape(-1, pixels.shape[-1])[:, :3]
+        if MiniBatchKMeans is None or len(rgb) < k:
+            return self._get_quantized_colors(rgb, k)
+        
+        # Seeded so the same photo always reports the same colours
+        rng = np.random.default_rng(0)
+        if len(rgb) > self.color_sample_pixels:
+            rgb = rgb[rng.choice(len(rgb), self.color_sample_pixels, replace=False)]
+        kmeans = MiniBatchKMeans(
+            n_clusters=k, batch_size=1024, n_init=1, max_iter=20, random_state=0
+        ).fit(rgb.astype(np.float32))
+        counts = np.bincount(kmeans.labels_, minlength=k)
+        
+        return [
+            {'rgb': tuple(int(c) for c in kmeans.cluster_centers_[label].round()), 'frequency': int(counts[label])}
+            for label in np.argsort(counts, kind='stable')[::-1] if counts[label]
+        ]
+    
+    def _get_quantized_colors(self, rgb: np.ndarray, k: int) -> List[Dict]:
+        """Most frequent colors of an (n, 3) RGB array after quantizing each channel to 8 levels."""
+        # Pack the three 3-bit levels into one 9-bit bin and count all pixels at once
+        levels = rgb >> 5
+        keys = (levels[:, 0].astype(np.uint16) << 6) | (levels[:, 1] << 3) | levels[:, 2]
+        counts = np.bincount(keys, minlength=512)
+        
+        # Most frequent k bins, most frequent first
+        top = np.argsort(counts, kind='stable')[::-1][:k]
+        return [
+            {'rgb': (int(key >> 6) * 32, int((key >> 3) & 7) * 32, int(key & 7) * 32), 'frequency': int(counts[key])}
+            for key in top if counts[key]
+        ]
     
     def _generate_assessment_text(self, photo_analysis: Dict, context: Optional[Dict]) -> str:
         """Generate textual description from photo analysis."""
@@ -157,7 +244,10 @@ class ArtifactAssessment:
     
     def _build_assessment_prompt(self, description: str, context: Optional[Dict]) -> str:
         """Build prompt for RAG chain artifact assessment."""
-        prompt = (
+        location = context.get('location') if context else None
+        location_context = f"\n\nLocation context: {location}" if location else ""
+        
+        return (
             "You are an archaeological artifact identification assistant. "
             "Analyze the following artifact description and provide:\n"
             "1. Possible artifact type and identification\n"
@@ -167,12 +257,8 @@ class ArtifactAssessment:
             "5. Any legal or ethical considerations\n\n"
             f"Artifact description:\n{description}\n\n"
             "Please provide a detailed, professional assessment."
+            f"{location_context}"
         )
-        
-        if context and context.get('location'):
-            prompt += f"\n\nLocation context: {context['location']}"
-        
-        return prompt
     
     def _generate_recommendations(self, assessment: Dict, context: Optional[Dict]) -> List[str]:
         """Generate actionable recommendations based on assessment."""
@@ -197,39 +283,25 @@ class ArtifactAssessment:
         return recommendations
     
     def image_to_base64(self, image: Image.Image) -> str:
-        """Convert PIL Image to base64 string for display."""
-        buffered = BytesIO()
-        image.save(buffered, format="PNG")
-        img_str = base64.b64encode(buffered.getvalue()).decode()
+        """
+        Convert PIL Image to base64 PNG string for display.
+        
+        Results are cached by a digest of all the pixel data, which is much
+        cheaper than the PNG deflate pass, so redisplaying an image reuses
+        its encoding while an edited image is encoded afresh.
+        """
+        key = (image.mode, image.size,
+               hashlib.blake2b(image.tobytes(), digest_size=16).digest())
+        img_str = self._b64_cache.pop(key, None)
+        if img_str is None:
+            buffered = BytesIO()
+            image.save(buffered, format="PNG", compress_level=1)
+            img_str = base64.b64encode(buffered.getvalue()).decode()
+        self._b64_cache[key] = img_str
+        while len(self._b64_cache) > self.base64_cache_size:
+            self._b64_cache.popitem(last=False)
         return img_str
     
     def get_guided_questions_template(self) -> Dict:
-        """Get template for guided questions."""
-        return {
-            'material': {
-                'question': 'What material is it?',
-                'options': ['stone', 'metal', 'pottery', 'bone', 'glass', 'organic', 'other'],
-                'required': True,
-            },
-            'size': {
-                'question': 'How big is it?',
-                'options': ['coin-sized', 'hand-sized', 'larger', 'very large'],
-                'required': True,
-            },
-            'location': {
-                'question': 'Where did you find it?',
-                'options': ['garden', 'construction site', 'beach', 'field', 'archaeological site', 'other'],
-                'required': True,
-            },
-            'markings': {
-                'question': 'Any markings or decorations?',
-                'options': None,  # Free text
-                'required': False,
-            },
-            'additional_notes': {
-                'question': 'Additional notes or observations',
-                'options': None,  # Free text
-                'required': False,
-            },
-        }
-
+        """Get template for guided questions (a shared, read-only dict)."""
+        return _GUIDED_QUESTIONS
@@ -5,16 +5,167 @@ Handles project-based organization, version control, export/import, and backups
 
 import os
 import json
+import math
 import shutil
+import uuid
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Optional, Any
 from datetime import datetime
-import pandas as pd
+from enum import Enum
 import logging
 
+import zstandard
+
+try:
+    import orjson  # optional, much faster indented JSON writes
+except ImportError:
+    orjson = None
+
+try:
+    import ijson  # optional, streams features out of large GeoJSON files
+except ImportError:
+    ijson = None
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# File name suffix of each JSON data type; other types use their own name
+JSON_FILE_SUFFIXES = {
+    'sites': 'sites',
+    'artifacts': 'artifacts',
+    'chat_history': 'chat',
+    'maps': 'maps',
+}
+# Saved JSON data is always written zstd-compressed
+ZSTD_LEVEL = 3
+COMPRESSED_JSON_SUFFIX = '.json.zst'
+# Threads reading data files in load_project_data
+LOAD_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+
+def _needs_stdlib_encoder(data: Any) -> bool:
+    """
+    Whether orjson would encode data to different values than json.dumps.
+    
+    That is the case for NaN and infinity (orjson writes null), float
+    subclasses such as numpy.float64 (orjson stringifies them) and Enums
+    that are not also int or str (orjson writes their value, not str()).
+    """
+    pending = [data]
+    while pending:
+        item = pending.pop()
+        if isinstance(item, float):
+            if type(item) is not float or not math.isfinite(item):
+                return True
+        elif isinstance(item, dict):
+            pending.extend(item.keys())
+            pending.extend(item.values())
+        elif isinstance(item, (list, tuple)):
+            pending.extend(item)
+        elif isinstance(item, Enum) and not isinstance(item, (int, str)):
+            return True
+    return False
+
+
+def encode_json(data: Any, indent: bool = True) -> bytes:
+    """
+    Encode data as JSON, stringifying anything not JSON-serialisable.
+    
+    Equivalent to json.dumps(data, indent=2 if indent else None, default=str),
+    using orjson when it is installed. Datetimes, dataclasses and numpy values
+    go through str() as with the stdlib, and payloads orjson cannot match
+    (see _needs_stdlib_encoder) use the stdlib encoder. The text may still
+    differ (raw UTF-8 rather than \\u escapes, "1e16" rather than "1e+16"),
+    but it loads back to the same values.
+    
+    Args:
+        data: Value to encode
+        indent: Indent nested values by two spaces
+    
+    Returns:
+        UTF-8 encoded JSON
+    """
+    if orjson is not None and not _needs_stdlib_encoder(data):
+        option = (orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+                  | orjson.OPT_PASSTHROUGH_DATACLASS)
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(data, default=str, option=option)
+        except TypeError:
+            pass  # e.g. integers beyond 64 bits; the stdlib encoder handles them
+    return json.dumps(data, indent=2 if indent else None, default=str).encode('utf-8')
+
+
+@contextmanager
+def _replacing(path: Path):
+    """
+    Yield a temporary path next to path, then atomically move it onto path.
+    
+    Backups hard-link project files, so writing an existing file in place
+    would change its backups too; replacing gives path a new inode instead.
+    Temporary files are dotfiles, which load_project_data skips.
+    """
+    # Not mkstemp: the file is created by the caller with the usual permissions
+    temp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        yield temp_path
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _write_json(path: Path, data: Any):
+    """Write data as indented JSON, zstd-compressed if path ends in .json.zst."""
+    payload = encode_json(data)
+    if path.name.endswith(COMPRESSED_JSON_SUFFIX):
+        payload = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(payload)
+    with _replacing(path) as temp_path:
+        temp_path.write_bytes(payload)
+
+
+def _read_json(path: str) -> Any:
+    """Read a .json or .json.zst file written by _write_json."""
+    with open(path, 'rb') as f:
+        payload = f.read()
+    if path.endswith(COMPRESSED_JSON_SUFFIX):
+        payload = zstandard.ZstdDecompressor().decompress(payload)
+    return json.loads(payload)
+
+
+def _load_item(path: str) -> Optional[Dict]:
+    """load_project_data entry for one data file, or None if it cannot be read."""
+    file_path = Path(path)
+    stem = file_path.stem
+    timestamp = stem.split('_', 2)[:2] if '_' in stem else None
+    if file_path.suffix == '.json' or path.endswith(COMPRESSED_JSON_SUFFIX):
+        try:
+            data = _read_json(path)
+        except Exception as e:
+            logger.warning(f"Error loading {file_path}: {e}")
+            return None
+    else:
+        data = path
+    return {
+        'data': data,
+        'file_path': path,
+        'timestamp': timestamp
+    }
+
+
+def _link_or_copy(src: str, dst: str):
+    """Hard-link src to dst, copying instead where links are unsupported (e.g. across filesystems)."""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
 
 class DataManager:
     """Manages project data, exports, imports, and backups."""
@@ -45,52 +196,28 @@ class DataManager:
             if data_type == "documents":
                 # For documents, data should be file path or content
                 if isinstance(data, str) and os.path.exists(data):
-                    # Copy file
-                    dest = data_dir / f"{timestamp}_{Path(data).name}"
-                    shutil.copy2(data, dest)
-                    data_path = str(dest)
+                    # Copy contents (kernel-side on Linux) and keep the original
+                    # times; permissions, flags and xattrs are not needed here
+                    data_path = data_dir / f"{timestamp}_{Path(data).name}"
+                    with _replacing(data_path) as temp_path:
+                        shutil.copyfile(data, temp_path)
+                        source_stat = os.stat(data)
+                        os.utime(temp_path, ns=(source_stat.st_atime_ns, source_stat.st_mtime_ns))
                 else:
                     # Save as text
                     data_path = data_dir / f"{timestamp}_document.txt"
-                    with open(data_path, 'w', encoding='utf-8') as f:
-                        f.write(str(data))
-                    data_path = str(data_path)
-            elif data_type == "sites":
-                # Save as JSON
-                data_path = data_dir / f"{timestamp}_sites.json"
-                with open(data_path, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, indent=2, default=str)
-                data_path = str(data_path)
-            elif data_type == "artifacts":
-                # Save as JSON
-                data_path = data_dir / f"{timestamp}_artifacts.json"
-                with open(data_path, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, indent=2, default=str)
-                data_path = str(data_path)
-            elif data_type == "chat_history":
-                # Save as JSON
-                data_path = data_dir / f"{timestamp}_chat.json"
-                with open(data_path, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, indent=2, default=str)
-                data_path = str(data_path)
-            elif data_type == "maps":
-                # Save as JSON
-                data_path = data_dir / f"{timestamp}_maps.json"
-                with open(data_path, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, indent=2, default=str)
-                data_path = str(data_path)
+                    with _replacing(data_path) as temp_path:
+                        temp_path.write_text(str(data), encoding='utf-8')
             else:
-                # Generic JSON save
-                data_path = data_dir / f"{timestamp}_{data_type}.json"
-                with open(data_path, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, indent=2, default=str)
-                data_path = str(data_path)
+                # Save as JSON
+                suffix = JSON_FILE_SUFFIXES.get(data_type, data_type)
+                data_path = data_dir / f"{timestamp}_{suffix}{COMPRESSED_JSON_SUFFIX}"
+                _write_json(data_path, data)
             
-            # Save metadata
+            # Save metadata (uncompressed) under the data file's full name, so
+            # e.g. "x.tar.gz" and "x.tar.bz2" do not share "x.tar.meta.json"
             if metadata:
-                meta_path = Path(data_path).with_suffix('.meta.json')
-                with open(meta_path, 'w', encoding='utf-8') as f:
-                    json.dump(metadata, f, indent=2, default=str)
+                _write_json(data_path.with_name(f"{data_path.name}.meta.json"), metadata)
             
             logger.info(f"Saved {data_type} to project {project_id}")
             return True
@@ -108,27 +235,23 @@ class DataManager:
             if not data_dir.exists():
                 return []
             
-            items = []
-            for file_path in sorted(data_dir.glob('*')):
-                if file_path.suffix == '.json' and not file_path.name.endswith('.meta.json'):
-                    try:
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            data = json.load(f)
-                            items.append({
-                                'data': data,
-                                'file_path': str(file_path),
-                                'timestamp': file_path.stem.split('_', 2)[:2] if '_' in file_path.stem else None
-                            })
-                    except Exception as e:
-                        logger.warning(f"Error loading {file_path}: {e}")
-                elif file_path.is_file() and file_path.suffix != '.json':
-                    items.append({
-                        'data': str(file_path),
-                        'file_path': str(file_path),
-                        'timestamp': file_path.stem.split('_', 2)[:2] if '_' in file_path.stem else None
-                    })
+            # DirEntry carries the file type from the directory listing, so
+            # telling files from subdirectories needs no extra stat() per file
+            with os.scandir(data_dir) as entries:
+                paths = sorted(
+                    entry.path for entry in entries
+                    if entry.is_file() and not entry.name.endswith('.meta.json')
+                    and not entry.name.startswith('.')
+                )
+            if not paths:
+                return []
+            
+            # Reading and decoding are mostly I/O and C code that release the
+            # GIL, so files are loaded concurrently (in their sorted order)
+            with ThreadPoolExecutor(max_workers=min(LOAD_WORKERS, len(paths))) as executor:
+                items = list(executor.map(_load_item, paths))
             
-            return items
+            return [item for item in items if item is not None]
             
         except Exception as e:
             logger.error(f"Error loading project data: {e}")
@@ -136,26 +259,23 @@ class DataManager:
     
     def export_to_csv(self, project_id: str, data_type: str, output_path: str) -> bool:
         """Export project data to CSV."""
+        import pandas as pd
+        
         try:
             items = self.load_project_data(project_id, data_type)
             if not items:
                 return False
             
             # Convert to DataFrame
-            if data_type in ['sites', 'artifacts']:
+            if data_type in ['sites', 'artifacts', 'maps']:
                 data_list = [item['data'] for item in items if isinstance(item['data'], dict)]
                 if data_list:
-                    df = pd.json_normalize(data_list)
-                    df.to_csv(output_path, index=False)
-                    return True
-            elif data_type == 'maps':
-                # Flatten map data
-                data_list = []
-                for item in items:
-                    if isinstance(item['data'], dict):
-                        data_list.append(item['data'])
-                if data_list:
-                    df = pd.json_normalize(data_list)
+                    # json_normalize walks every record in Python to flatten nested
+                    # dicts; flat records (the usual case) go straight to the constructor
+                    if any(isinstance(value, dict) for record in data_list for value in record.values()):
+                        df = pd.json_normalize(data_list)
+                    else:
+                        df = pd.DataFrame.from_records(data_list)
                     df.to_csv(output_path, index=False)
                     return True
             
@@ -176,23 +296,25 @@ class DataManager:
             for item in items:
                 data = item['data']
                 if isinstance(data, dict) and 'latitude' in data and 'longitude' in data:
-                    feature = {
+                    properties = dict(data)
+                    longitude = properties.pop('longitude')
+                    latitude = properties.pop('latitude')
+                    features.append({
                         "type": "Feature",
                         "geometry": {
                             "type": "Point",
-                            "coordinates": [data['longitude'], data['latitude']]
+                            "coordinates": [longitude, latitude]
                         },
-                        "properties": {k: v for k, v in data.items() if k not in ['latitude', 'longitude']}
-                    }
-                    features.append(feature)
+                        "properties": properties
+                    })
             
             geojson = {
                 "type": "FeatureCollection",
                 "features": features
             }
             
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(geojson, f, indent=2)
+            # Serialised in C by orjson when it is installed
+            _write_json(Path(output_path), geojson)
             
             return True
             
@@ -202,6 +324,8 @@ class DataManager:
     
     def import_from_csv(self, project_id: str, data_type: str, csv_path: str) -> bool:
         """Import data from CSV file."""
+        import pandas as pd
+        
         try:
             df = pd.read_csv(csv_path)
             data = df.to_dict('records')
@@ -221,17 +345,20 @@ class DataManager:
     def import_from_geojson(self, project_id: str, data_type: str, geojson_path: str) -> bool:
         """Import sites from GeoJSON file."""
         try:
-            with open(geojson_path, 'r', encoding='utf-8') as f:
-                geojson = json.load(f)
-            
             sites = []
-            for feature in geojson.get('features', []):
-                props = feature.get('properties', {})
-                coords = feature.get('geometry', {}).get('coordinates', [])
-                if len(coords) >= 2:
-                    props['longitude'] = coords[0]
-                    props['latitude'] = coords[1]
-                sites.append(props)
+            with open(geojson_path, 'rb') as f:
+                # With ijson only one feature at a time is parsed, rather than the whole document
+                if ijson is not None:
+                    features = ijson.items(f, 'features.item', use_float=True)
+                else:
+                    features = json.load(f).get('features', [])
+                for feature in features:
+                    props = feature.get('properties', {})
+                    coords = feature.get('geometry', {}).get('coordinates', [])
+                    if len(coords) >= 2:
+                        props['longitude'] = coords[0]
+                        props['latitude'] = coords[1]
+                    sites.append(props)
             
             metadata = {
                 'imported_from': geojson_path,
@@ -246,7 +373,15 @@ class DataManager:
             return False
     
     def create_backup(self, project_id: str) -> Optional[str]:
-        """Create a backup of project data."""
+        """
+        Create a backup of project data.
+        
+        Files are hard-linked into the backup rather than copied, so a backup
+        costs directory entries instead of a second copy of the data. This
+        relies on project files never being rewritten in place: saves write
+        a temporary file and replace the target (see _replacing), and
+        restores copy rather than link.
+        """
         try:
             project_dir = self.get_project_directory(project_id)
             if not project_dir.exists():
@@ -255,7 +390,7 @@ class DataManager:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             backup_path = self.backups_directory / f"{project_id}_{timestamp}"
             
-            shutil.copytree(project_dir, backup_path)
+            shutil.copytree(project_dir, backup_path, copy_function=_link_or_copy)
             
             # Save backup metadata
             backup_meta = {
@@ -330,20 +465,25 @@ class DataManager:
         }
         
         project_dir = self.get_project_directory(project_id)
+        total_bytes = 0
         
         for data_type in ['documents', 'sites', 'artifacts', 'maps', 'chat_history']:
             data_dir = project_dir / data_type
             if data_dir.exists():
-                count = len(list(data_dir.glob('*')))
-                # Count only non-metadata files
-                count = len([f for f in data_dir.glob('*') if not f.name.endswith('.meta.json')])
+                # Count entries and sum file sizes in one listing of the directory
+                count = 0
+                with os.scandir(data_dir) as entries:
+                    for entry in entries:
+                        # Count only non-metadata files
+                        if not entry.name.endswith('.meta.json'):
+                            count += 1
+                        if entry.is_file():
+                            total_bytes += entry.stat().st_size
+                        elif entry.is_dir():
+                            for root, _, file_names in os.walk(entry.path):
+                                total_bytes += sum(os.path.getsize(os.path.join(root, name)) for name in file_names)
                 stats[data_type.replace('_history', '_sessions')] = count
-                
-                # Calculate size
-                for file_path in data_dir.rglob('*'):
-                    if file_path.is_file():
-                        stats['total_size_mb'] += file_path.stat().st_size / (1024 * 1024)
         
-        stats['total_size_mb'] = round(stats['total_size_mb'], 2)
+        stats['total_size_mb'] = round(total_bytes / (1024 * 1024), 2)
         return stats
 
@@ -6,20 +6,215 @@ Also supports simple extraction of coordinates and dates for visualisations.
 
 import logging
 import re
-from typing import List, Dict
+from concurrent.futures import Executor
+from typing import List, Dict, Optional
 
 import pdfplumber
 import PyPDF2
 
+try:
+    import fitz  # PyMuPDF: optional, much faster text extraction
+except ImportError:
+    fitz = None
+
+try:
+    import re2  # google-re2: optional, linear-time matching
+except ImportError:
+    re2 = None
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+# ----------------------------------------------------------------------
+# Extraction patterns, compiled once at import
+# ----------------------------------------------------------------------
+
+# Non-ASCII characters that re's Unicode \s, \d, \w and \b treat as
+# whitespace or word characters but RE2's ASCII-only classes do not
+# (e.g. the no-break spaces PyMuPDF and pdfplumber often emit)
+_UNICODE_CLASS_CHAR_RE = re.compile(r'(?=[^\x00-\x7f])[\w\s]')
+
+
+class _RE2Pattern:
+    """
+    RE2 pattern that defers to ``re`` for text where the two engines disagree.
+    
+    Only ``finditer`` and ``search`` are provided, which is all the
+    extractors use.
+    """
+    
+    def __init__(self, pattern: str, flags: int):
+        self._re = re.compile(pattern, flags)
+        inline = ("i" if flags & re.IGNORECASE else "") + ("m" if flags & re.MULTILINE else "")
+        self._re2 = re2.compile(f"(?{inline}){pattern}" if inline else pattern)
+    
+    def _engine(self, text: str):
+        return self._re if _UNICODE_CLASS_CHAR_RE.search(text) else self._re2
+    
+    def finditer(self, text: str):
+        return self._engine(text).finditer(text)
+    
+    def search(self, text: str):
+        return self._engine(text).search(text)
+
+
+def _compile(pattern: str, flags: int = 0):
+    """
+    Compile an extraction pattern, preferring RE2 when it is installed.
+    
+    RE2 matches in linear time, so number-heavy pages (survey tables, grid
+    references) cannot trigger the backtracking blow-ups that patterns like
+    the coordinate ones allow under ``re``. All patterns below stay within
+    the syntax both engines share. RE2's \s, \d and \b are ASCII-only,
+    though, so text with non-ASCII whitespace or word characters is matched
+    with ``re`` to keep results identical.
+    
+    Args:
+        pattern: Regular expression
+        flags: ``re`` flags (only IGNORECASE and MULTILINE are used)
+        
+    Returns:
+        Compiled pattern with ``re``'s ``finditer`` and ``search``
+    """
+    if re2 is None:
+        return re.compile(pattern, flags)
+    return _RE2Pattern(pattern, flags)
+
+
+# "28.6128° N, 77.2311° E" or "28.6128 N, 77.2311 E"
+_DECIMAL_WITH_DIRS_RE = _compile(
+    r'(?P<lat>-?\d{1,2}\.?\d*)\s*°?\s*[,\s]*(?P<lat_dir>[NS])[,\s]*'
+    r'(?P<lon>-?\d{1,3}\.?\d*)\s*°?\s*[,\s]*(?P<lon_dir>[EW])',
+    re.IGNORECASE | re.MULTILINE
+)
+
+# "40°42'46\"N 74°00'21\"W" or "N 35°42'12\", E 139°46'35\""
+_DMS_RE = _compile(
+    r'(?:N|S|North|South)?\s*(?P<lat_deg>\d{1,2})°\s*(?P<lat_min>\d{1,2})[\'′]\s*(?P<lat_sec>\d{1,2}(?:\.\d+)?)[\"″]?\s*(?P<lat_dir>[NS])'
+    r'[,\s]+'
+    r'(?:E|W|East|West)?\s*(?P<lon_deg>\d{1,3})°\s*(?P<lon_min>\d{1,2})[\'′]\s*(?P<lon_sec>\d{1,2}(?:\.\d+)?)[\"″]?\s*(?P<lon_dir>[EW])',
+    re.IGNORECASE | re.MULTILINE
+)
+
+# "12.9716, 77.5946" or "Site center: 12.9716, 77.5946"
+_SIMPLE_DECIMAL_RE = _compile(
+    r'(?P<lat>-?\d{1,2}\.\d{2,6})[,\s]+(?P<lon>-?\d{1,3}\.\d{2,6})',
+    re.MULTILINE
+)
+
+# "UTM Zone 43N 582639 4512345"
+_UTM_RE = _compile(
+    r'UTM\s+Zone\s+(?P<zone>\d{1,2})(?P<hemisphere>[NS])\s+(?P<easting>\d{6,7})\s+(?P<northing>\d{7,8})',
+    re.IGNORECASE | re.MULTILINE
+)
+
+# "1998 to 2002", "1998-2002", "from 1998 to 2002"
+_MODERN_RANGE_RE = _compile(
+    r'(?:from|between|during)?\s*(?P<start>(?:18|19|20)\d{2})\s*(?:to|-|–)\s*(?P<end>(?:18|19|20)\d{2})\b',
+    re.IGNORECASE | re.MULTILINE
+)
+
+# "2500–1900 BCE", "3000–2000 BC", "2500-1900 BCE"
+_BCE_RANGE_RE = _compile(
+    r'(?P<start>\d{3,4})\s*(?:-|–)\s*(?P<end>\d{3,4})\s*(?:BCE|BC|B\.C\.|B\.C\.E\.)',
+    re.IGNORECASE | re.MULTILINE
+)
+
+# "2500 BCE", "3000 BC"
+_BCE_SINGLE_RE = _compile(
+    r'\b(?P<year>\d{3,4})\s*(?:BCE|BC|B\.C\.|B\.C\.E\.)\b',
+    re.IGNORECASE | re.MULTILINE
+)
+
+# "summer 2005", "Field season: June–August 2014"
+_CONTEXTUAL_DATE_RE = _compile(
+    r'(?:summer|winter|spring|fall|autumn|field\s+season|excavated|surveyed|dated)\s+(?:in\s+)?(?P<year>(?:18|19|20)\d{2})\b',
+    re.IGNORECASE | re.MULTILINE
+)
+
+# Standalone modern years (18xx, 19xx, 20xx)
+_YEAR_RE = _compile(r'\b(?P<year>(?:18|19|20)\d{2})\b')
+
+# Years that sit inside UTM references or long numbers
+_NUMERIC_CONTEXT_RE = _compile(r'UTM|Zone|\d{6,}')
+
+# "Site X: Name" or "Site X Name"
+_SITE_NUMBER_RE = _compile(
+    r'Site\s+(?P<num>\d+)[:\s]+(?P<name>[A-Za-z][A-Za-z\s\-]+?)(?:[,\s\.]|$)',
+    re.IGNORECASE | re.MULTILINE
+)
+
+# "CODE-123 (Name)" or "CODE (Name)"
+_SITE_CODE_RE = _compile(
+    r'([A-Z]{2,4}[-]?\d{1,4})\s*\(([^)]+)\)',
+    re.IGNORECASE | re.MULTILINE
+)
+
+# "Trench T-X", "Locus LXX", "Mound A at Site 3"
+_TRENCH_RE = _compile(r'Trench\s+([A-Z]?[-]?\d+)', re.IGNORECASE | re.MULTILINE)
+_LOCUS_RE = _compile(r'Locus\s+([A-Z]?[-]?\d+)', re.IGNORECASE | re.MULTILINE)
+_MOUND_RE = _compile(r'Mound\s+([A-Z])\s+at\s+Site\s+(\d+)', re.IGNORECASE | re.MULTILINE)
+
+# "Site X: Name" within a short context snippet
+_CONTEXT_SITE_NUMBER_RE = _compile(r'Site\s+(?P<num>\d+)[:\s]+(?P<name>[A-Za-z][A-Za-z\s\-]+?)(?:[,\s]|$)', re.IGNORECASE)
+
+# "Trench T-X", "Locus LXX" or "Mound A" within a context snippet
+_CONTEXT_FEATURE_RE = _compile(r'(Trench|Locus|Mound)\s+([A-Z]?[-]?\d+)', re.IGNORECASE)
+
+
+def extract_page_range(pdf_path: str, start: int, stop: int, engine: str = "pdfplumber") -> str:
+    """
+    Extract text from pages [start, stop) with pdfplumber or PyMuPDF.
+
+    Module-level so it can be submitted to a process pool; the output uses
+    the same page markers as PDFProcessor.extract_text_pdfplumber.
+    """
+    text = ""
+    if engine == "pymupdf":
+        with fitz.open(pdf_path) as doc:
+            for i in range(start, min(stop, doc.page_count)):
+                page_text = doc[i].get_text().strip()
+                if page_text:
+                    text += f"\n\n--- Page {i+1} ---\n\n{page_text}"
+        return text
+
+    with pdfplumber.open(pdf_path) as pdf:
+        for i in range(start, min(stop, len(pdf.pages))):
+            page_text = pdf.pages[i].extract_text()
+            if page_text:
+                text += f"\n\n--- Page {i+1} ---\n\n{page_text}"
+    return text
+
+
+def _page_count(pdf_path: str, engine: str) -> int:
+    """Number of pages in a PDF, opened with the given engine."""
+    if engine == "pymupdf":
+        with fitz.open(pdf_path) as doc:
+            return doc.page_count
+    with pdfplumber.open(pdf_path) as pdf:
+        return len(pdf.pages)
+
+
 class PDFProcessor:
     """Process PDF files to extract text content and basic structured data."""
 
-    def __init__(self, pdf_path: str):
+    def __init__(self, pdf_path: str, engine: str = "auto"):
+        """
+        Args:
+            pdf_path: Path to the PDF file
+            engine: Text extraction engine - "pymupdf", "pdfplumber", or "auto"
+                (PyMuPDF when installed, otherwise pdfplumber)
+        """
+        if engine == "auto":
+            engine = "pymupdf" if fitz is not None else "pdfplumber"
+        if engine not in ("pymupdf", "pdfplumber"):
+            raise ValueError(f"Unknown PDF text engine: {engine}")
+        if engine == "pymupdf" and fitz is None:
+            raise ImportError("The pymupdf engine requires PyMuPDF. Please install: pip install pymupdf")
+
         self.pdf_path = pdf_path
+        self.engine = engine
         self.text_chunks: List[str] = []
         self.full_text: str = ""
 
@@ -42,6 +237,15 @@ class PDFProcessor:
         self.full_text = full_text
         return full_text
 
+    def extract_text_pymupdf(self) -> str:
+        """Extract text using PyMuPDF (fastest; requires the optional pymupdf package)."""
+        with fitz.open(self.pdf_path) as doc:
+            page_count = doc.page_count
+        logger.info(f"Processing PDF with {page_count} pages")
+        full_text = extract_page_range(self.pdf_path, 0, page_count, engine="pymupdf")
+        self.full_text = full_text
+        return full_text
+
     def extract_text_pypdf2(self) -> str:
         """Extract text using PyPDF2 (fallback method)."""
         full_text = ""
@@ -61,8 +265,41 @@ class PDFProcessor:
         self.full_text = full_text
         return full_text
 
+    def extract_text_parallel(self, executor: Executor, pages_per_task: int = 8) -> str:
+        """
+        Extract text by fanning page ranges out to an executor.
+
+        Args:
+            executor: Executor to run page extraction on (typically a process pool)
+            pages_per_task: Number of pages handled by each submitted task
+
+        Returns:
+            Full text, identical to a serial extract_text with the same engine
+        """
+        try:
+            page_count = _page_count(self.pdf_path, self.engine)
+            logger.info(f"Processing PDF with {page_count} pages in parallel ({self.engine})")
+            futures = [
+                executor.submit(
+                    extract_page_range, self.pdf_path, start, start + pages_per_task, self.engine
+                )
+                for start in range(0, page_count, pages_per_task)
+            ]
+            full_text = "".join(future.result() for future in futures)
+        except Exception as e:
+            logger.warning(f"Parallel extraction failed, falling back to serial: {e}")
+            return self.extract_text()
+
+        self.full_text = full_text
+        return full_text
+
     def extract_text(self) -> str:
         """Main method to extract text from PDF."""
+        if self.engine == "pymupdf":
+            try:
+                return self.extract_text_pymupdf()
+            except Exception as e:
+                logger.warning(f"PyMuPDF failed, trying pdfplumber: {e}")
         try:
             return self.extract_text_pdfplumber()
         except Exception as e:
@@ -139,6 +376,40 @@ class PDFProcessor:
             self.full_text = self.extract_text()
         return self.full_text
 
+    def extract_all(self, executor: Optional[Executor] = None) -> Dict[str, List[Dict]]:
+        """
+        Run coordinate, date, and site extraction over the same text.
+        
+        The PDF is read at most once and the resulting full_text is shared by
+        all three extractions. With an executor they run concurrently;
+        otherwise they run in turn. A failing extraction yields an empty list.
+        
+        Args:
+            executor: Optional executor to run the three extractions on
+        
+        Returns:
+            Dict with keys "coords", "dates", "sites"
+        """
+        self._ensure_full_text()
+        extractors = {
+            "coords": self.extract_coordinates,
+            "dates": self.extract_dates,
+            "sites": self.extract_sites,
+        }
+        
+        futures = {}
+        if executor is not None:
+            futures = {key: executor.submit(fn) for key, fn in extractors.items()}
+        
+        extracted: Dict[str, List[Dict]] = {}
+        for key, fn in extractors.items():
+            try:
+                extracted[key] = futures[key].result() if futures else fn()
+            except Exception as e:
+                logger.warning(f"Extraction of {key} failed: {e}")
+                extracted[key] = []
+        return extracted
+
     def _dms_to_decimal(self, degrees: int, minutes: int, seconds: float, direction: str) -> float:
         """Convert degrees-minutes-seconds to decimal degrees."""
         decimal = degrees + minutes / 60.0 + seconds / 3600.0
@@ -164,12 +435,7 @@ class PDFProcessor:
         
         # Pattern 1: Decimal degrees with N/S/E/W indicators
         # "28.6128° N, 77.2311° E" or "28.6128 N, 77.2311 E"
-        decimal_with_dirs = re.compile(
-            r'(?P<lat>-?\d{1,2}\.?\d*)\s*°?\s*[,\s]*(?P<lat_dir>[NS])[,\s]*'
-            r'(?P<lon>-?\d{1,3}\.?\d*)\s*°?\s*[,\s]*(?P<lon_dir>[EW])',
-            re.IGNORECASE | re.MULTILINE
-        )
-        for match in decimal_with_dirs.finditer(text):
+        for match in _DECIMAL_WITH_DIRS_RE.finditer(text):
             try:
                 lat = float(match.group("lat"))
                 lon = float(match.group("lon"))
@@ -206,13 +472,7 @@ class PDFProcessor:
                 continue
         
         # Pattern 2: DMS format - "40°42'46\"N 74°00'21\"W" or "N 35°42'12\", E 139°46'35\""
-        dms_pattern = re.compile(
-            r'(?:N|S|North|South)?\s*(?P<lat_deg>\d{1,2})°\s*(?P<lat_min>\d{1,2})[\'′]\s*(?P<lat_sec>\d{1,2}(?:\.\d+)?)[\"″]?\s*(?P<lat_dir>[NS])'
-            r'[,\s]+'
-            r'(?:E|W|East|West)?\s*(?P<lon_deg>\d{1,3})°\s*(?P<lon_min>\d{1,2})[\'′]\s*(?P<lon_sec>\d{1,2}(?:\.\d+)?)[\"″]?\s*(?P<lon_dir>[EW])',
-            re.IGNORECASE | re.MULTILINE
-        )
-        for match in dms_pattern.finditer(text):
+        for match in _DMS_RE.finditer(text):
             try:
                 lat_deg = int(match.group("lat_deg"))
                 lat_min = int(match.group("lat_min"))
@@ -252,11 +512,7 @@ class PDFProcessor:
         
         # Pattern 3: Simple decimal pairs without direction indicators
         # "12.9716, 77.5946" or "Site center: 12.9716, 77.5946"
-        simple_decimal = re.compile(
-            r'(?P<lat>-?\d{1,2}\.\d{2,6})[,\s]+(?P<lon>-?\d{1,3}\.\d{2,6})',
-            re.MULTILINE
-        )
-        for match in simple_decimal.finditer(text):
+        for match in _SIMPLE_DECIMAL_RE.finditer(text):
             try:
                 lat = float(match.group("lat"))
                 lon = float(match.group("lon"))
@@ -287,11 +543,7 @@ class PDFProcessor:
         
         # Pattern 4: UTM coordinates (basic - note: UTM requires zone conversion)
         # "UTM Zone 43N 582639 4512345" - we'll extract but note it needs conversion
-        utm_pattern = re.compile(
-            r'UTM\s+Zone\s+(?P<zone>\d{1,2})(?P<hemisphere>[NS])\s+(?P<easting>\d{6,7})\s+(?P<northing>\d{7,8})',
-            re.IGNORECASE | re.MULTILINE
-        )
-        for match in utm_pattern.finditer(text):
+        for match in _UTM_RE.finditer(text):
             # Note: UTM to lat/lon conversion requires pyproj library
             # For now, we'll log it but skip adding to results
             # Users can manually convert or we can add pyproj later
@@ -319,11 +571,7 @@ class PDFProcessor:
         
         # Pattern 1: Modern year ranges (CE/AD)
         # "1998 to 2002", "1998-2002", "from 1998 to 2002"
-        modern_range_pattern = re.compile(
-            r'(?:from|between|during)?\s*(?P<start>(?:18|19|20)\d{2})\s*(?:to|-|–)\s*(?P<end>(?:18|19|20)\d{2})\b',
-            re.IGNORECASE | re.MULTILINE
-        )
-        for match in modern_range_pattern.finditer(text):
+        for match in _MODERN_RANGE_RE.finditer(text):
             try:
                 start_year = int(match.group("start"))
                 end_year = int(match.group("end"))
@@ -354,11 +602,7 @@ class PDFProcessor:
         
         # Pattern 2: BCE/BC date ranges
         # "2500–1900 BCE", "3000–2000 BC", "2500-1900 BCE"
-        bce_range_pattern = re.compile(
-            r'(?P<start>\d{3,4})\s*(?:-|–)\s*(?P<end>\d{3,4})\s*(?:BCE|BC|B\.C\.|B\.C\.E\.)',
-            re.IGNORECASE | re.MULTILINE
-        )
-        for match in bce_range_pattern.finditer(text):
+        for match in _BCE_RANGE_RE.finditer(text):
             try:
                 start_year_bce = int(match.group("start"))
                 end_year_bce = int(match.group("end"))
@@ -393,11 +637,7 @@ class PDFProcessor:
         
         # Pattern 3: Single BCE/BC years
         # "2500 BCE", "3000 BC"
-        bce_single_pattern = re.compile(
-            r'\b(?P<year>\d{3,4})\s*(?:BCE|BC|B\.C\.|B\.C\.E\.)\b',
-            re.IGNORECASE | re.MULTILINE
-        )
-        for match in bce_single_pattern.finditer(text):
+        for match in _BCE_SINGLE_RE.finditer(text):
             try:
                 year_bce = int(match.group("year"))
                 year = -year_bce
@@ -424,11 +664,7 @@ class PDFProcessor:
         
         # Pattern 4: Contextual modern dates with months/seasons
         # "summer 2005", "June–August 2014", "Field season: June–August 2014"
-        contextual_date_pattern = re.compile(
-            r'(?:summer|winter|spring|fall|autumn|field\s+season|excavated|surveyed|dated)\s+(?:in\s+)?(?P<year>(?:18|19|20)\d{2})\b',
-            re.IGNORECASE | re.MULTILINE
-        )
-        for match in contextual_date_pattern.finditer(text):
+        for match in _CONTEXTUAL_DATE_RE.finditer(text):
             try:
                 year = int(match.group("year"))
                 
@@ -454,8 +690,7 @@ class PDFProcessor:
         
         # Pattern 5: Standalone modern years (18xx, 19xx, 20xx)
         # Avoid double-counting ones already captured
-        year_pattern = re.compile(r'\b(?P<year>(?:18|19|20)\d{2})\b')
-        for match in year_pattern.finditer(text):
+        for match in _YEAR_RE.finditer(text):
             try:
                 year = int(match.group("year"))
                 
@@ -465,7 +700,7 @@ class PDFProcessor:
                 
                 # Skip if it's part of a UTM coordinate or other number
                 context_check = text[max(0, match.start()-5):min(len(text), match.end()+5)]
-                if re.search(r'UTM|Zone|\d{6,}', context_check):
+                if _NUMERIC_CONTEXT_RE.search(context_check):
                     continue
                 
                 start = max(0, match.start() - context_window)
@@ -506,11 +741,7 @@ class PDFProcessor:
         seen_sites = set()
         
         # Pattern 1: "Site X: Name" or "Site X Name"
-        site_pattern1 = re.compile(
-            r'Site\s+(?P<num>\d+)[:\s]+(?P<name>[A-Za-z][A-Za-z\s\-]+?)(?:[,\s\.]|$)',
-            re.IGNORECASE | re.MULTILINE
-        )
-        for match in site_pattern1.finditer(text):
+        for match in _SITE_NUMBER_RE.finditer(text):
             site_name = f"Site {match.group('num')}: {match.group('name').strip()}"
             if site_name not in seen_sites:
                 seen_sites.add(site_name)
@@ -524,11 +755,7 @@ class PDFProcessor:
                 })
         
         # Pattern 2: "CODE-123 (Name)" or "CODE (Name)"
-        site_pattern2 = re.compile(
-            r'([A-Z]{2,4}[-]?\d{1,4})\s*\(([^)]+)\)',
-            re.IGNORECASE | re.MULTILINE
-        )
-        for match in site_pattern2.finditer(text):
+        for match in _SITE_CODE_RE.finditer(text):
             site_name = f"{match.group(1)} ({match.group(2)})"
             if site_name not in seen_sites:
                 seen_sites.add(site_name)
@@ -543,9 +770,9 @@ class PDFProcessor:
         
         # Pattern 3: "Trench T-X" or "Locus LXX"
         for pattern_type, pattern in [
-            ("Trench", re.compile(r'Trench\s+([A-Z]?[-]?\d+)', re.IGNORECASE | re.MULTILINE)),
-            ("Locus", re.compile(r'Locus\s+([A-Z]?[-]?\d+)', re.IGNORECASE | re.MULTILINE)),
-            ("Mound", re.compile(r'Mound\s+([A-Z])\s+at\s+Site\s+(\d+)', re.IGNORECASE | re.MULTILINE)),
+            ("Trench", _TRENCH_RE),
+            ("Locus", _LOCUS_RE),
+            ("Mound", _MOUND_RE),
         ]:
             for match in pattern.finditer(text):
                 if pattern_type == "Mound":
@@ -579,26 +806,22 @@ class PDFProcessor:
         - "Mound A at Site 3"
         """
         # Pattern 1: "Site X: Name" or "Site X Name"
-        site_pattern1 = re.compile(r'Site\s+(?P<num>\d+)[:\s]+(?P<name>[A-Za-z][A-Za-z\s\-]+?)(?:[,\s]|$)', re.IGNORECASE)
-        match = site_pattern1.search(context)
+        match = _CONTEXT_SITE_NUMBER_RE.search(context)
         if match:
             return f"Site {match.group('num')}: {match.group('name').strip()}"
         
         # Pattern 2: "CODE-123 (Name)" or "CODE (Name)"
-        site_pattern2 = re.compile(r'([A-Z]{2,4}[-]?\d{1,4})\s*\(([^)]+)\)', re.IGNORECASE)
-        match = site_pattern2.search(context)
+        match = _SITE_CODE_RE.search(context)
         if match:
             return f"{match.group(1)} ({match.group(2)})"
         
         # Pattern 3: "Trench T-X" or "Locus LXX"
-        site_pattern3 = re.compile(r'(Trench|Locus|Mound)\s+([A-Z]?[-]?\d+)', re.IGNORECASE)
-        match = site_pattern3.search(context)
+        match = _CONTEXT_FEATURE_RE.search(context)
         if match:
             return f"{match.group(1)} {match.group(2)}"
         
         # Pattern 4: "Mound X at Site Y"
-        site_pattern4 = re.compile(r'Mound\s+([A-Z])\s+at\s+Site\s+(\d+)', re.IGNORECASE)
-        match = site_pattern4.search(context)
+        match = _MOUND_RE.search(context)
         if match:
             return f"Mound {match.group(1)} at Site {match.group(2)}"
         
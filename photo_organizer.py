@@ -5,9 +5,12 @@ Auto-organizes archaeological dig photos by trench/locus, artifact types, strati
 
 import os
 import re
+import threading
+from collections import OrderedDict
 from pathlib import Path
 from datetime import datetime
 from typing import List, Dict, Optional, Tuple
+import numpy as np
 from PIL import Image
 from PIL.ExifTags import TAGS
 import logging
@@ -15,6 +18,31 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 64-bit perceptual hashes keyed by (path, mtime_ns, size), shared by all
+# organizers so rescans and repeated duplicate checks only decode new or changed
+# files. None marks a featureless image. Least recently used entries are evicted.
+_PHASH_CACHE: 'OrderedDict[Tuple[str, int, int], Optional[int]]' = OrderedDict()
+_PHASH_CACHE_LOCK = threading.Lock()
+PHASH_CACHE_SIZE = 50000
+# Images whose 9x8 thumbnail spans fewer grey levels than this have no
+# gradients to hash (solid black, white or soil-coloured frames)
+FLAT_IMAGE_RANGE = 4
+# Rows of the pairwise Hamming distance matrix computed at a time
+HAMMING_BLOCK_ROWS = 1024
+# Set bits in every byte value, for NumPy versions without bitwise_count
+_BYTE_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def _popcount64(values: np.ndarray) -> np.ndarray:
+    """Number of set bits in each element of a uint64 array."""
+    if hasattr(np, 'bitwise_count'):  # NumPy 2.0+
+        return np.bitwise_count(values)
+    as_bytes = values.view(np.uint8).reshape(values.shape + (8,))
+    counts = np.zeros(values.shape, dtype=np.uint8)
+    for k in range(8):
+        counts += _BYTE_POPCOUNT[as_bytes[..., k]]
+    return counts
+
 
 class PhotoOrganizer:
     """Organizes archaeological dig photos with automatic categorization and metadata extraction."""
@@ -23,6 +51,8 @@ class PhotoOrganizer:
         self.photo_directory = Path(photo_directory)
         self.supported_formats = {'.jpg', '.jpeg', '.png', '.tiff', '.tif', '.heic'}
         self.photos = []
+        # organize_by_* results for the current scan, keyed by grouping name
+        self._groupings: Dict[str, Dict[str, List[Dict]]] = {}
         
     def scan_directory(self) -> List[Dict]:
         """Scan directory for photos and extract metadata."""
@@ -40,6 +70,7 @@ class PhotoOrganizer:
                     logger.warning(f"Error processing {file_path}: {e}")
                     
         self.photos = photos
+        self._groupings = {}
         return photos
     
     def _extract_metadata(self, file_path: Path) -> Dict:
@@ -148,85 +179,122 @@ class PhotoOrganizer:
         
         return parsed
     
+    def _group(self, grouping: str, key_fn) -> Dict[str, List[Dict]]:
+        """Group photos by key_fn, reusing the result until the next scan."""
+        organized = self._groupings.get(grouping)
+        if organized is None:
+            organized = {}
+            for photo in self.photos:
+                organized.setdefault(key_fn(photo), []).append(photo)
+            self._groupings[grouping] = organized
+        return organized
+    
     def organize_by_trench(self) -> Dict[str, List[Dict]]:
         """Organize photos by trench number."""
-        organized = {}
-        for photo in self.photos:
-            trench = photo.get('trench') or 'Unknown'
-            if trench not in organized:
-                organized[trench] = []
-            organized[trench].append(photo)
-        return organized
+        return self._group('trench', lambda photo: photo.get('trench') or 'Unknown')
     
     def organize_by_locus(self) -> Dict[str, List[Dict]]:
         """Organize photos by locus number."""
-        organized = {}
-        for photo in self.photos:
-            locus = photo.get('locus') or 'Unknown'
-            if locus not in organized:
-                organized[locus] = []
-            organized[locus].append(photo)
-        return organized
+        return self._group('locus', lambda photo: photo.get('locus') or 'Unknown')
     
     def organize_by_artifact_type(self) -> Dict[str, List[Dict]]:
         """Organize photos by artifact type."""
-        organized = {}
-        for photo in self.photos:
-            artifact_type = photo.get('artifact_type') or 'Unknown'
-            if artifact_type not in organized:
-                organized[artifact_type] = []
-            organized[artifact_type].append(photo)
-        return organized
+        return self._group('artifact_type', lambda photo: photo.get('artifact_type') or 'Unknown')
     
     def organize_by_stratigraphy(self) -> Dict[str, List[Dict]]:
         """Organize photos by stratigraphy layer."""
-        organized = {}
-        for photo in self.photos:
-            layer = photo.get('stratigraphy_layer') or 'Unknown'
-            if layer not in organized:
-                organized[layer] = []
-            organized[layer].append(photo)
-        return organized
+        return self._group('stratigraphy', lambda photo: photo.get('stratigraphy_layer') or 'Unknown')
     
     def organize_by_date(self) -> Dict[str, List[Dict]]:
         """Organize photos by date taken."""
-        organized = {}
-        for photo in self.photos:
+        def date_key(photo: Dict) -> str:
             date = photo.get('date_taken') or photo.get('date_from_filename') or photo.get('date_modified')
-            if date:
-                date_key = date.strftime('%Y-%m-%d')
-                if date_key not in organized:
-                    organized[date_key] = []
-                organized[date_key].append(photo)
-            else:
-                if 'No Date' not in organized:
-                    organized['No Date'] = []
-                organized['No Date'].append(photo)
-        return organized
+            return date.strftime('%Y-%m-%d') if date else 'No Date'
+        
+        return self._group('date', date_key)
     
     def find_duplicates(self, similarity_threshold: float = 0.95) -> List[List[Dict]]:
-        """Find duplicate or near-duplicate photos based on file size and dimensions."""
-        # Simple duplicate detection based on file size and dimensions
-        # For production, consider using perceptual hashing (e.g., imagehash library)
-        duplicates = []
-        seen = {}
+        """
+        Find duplicate or near-duplicate photos by perceptual hash.
         
+        Each photo gets a 64-bit difference hash, so re-encoded, resized or
+        lightly edited copies still match. Photos whose hashes differ in at
+        most (1 - similarity_threshold) * 64 bits are grouped together; the
+        distances are computed with vectorised XOR and popcount. Featureless
+        images (solid colour, lens cap) have no usable hash and are skipped.
+        """
+        photos, hashes = [], []
         for photo in self.photos:
-            key = (photo.get('file_size'), photo.get('dimensions'))
-            if key in seen:
-                # Check if this is part of an existing duplicate group
-                found_group = False
-                for group in duplicates:
-                    if seen[key] in group:
-                        group.append(photo)
-                        found_group = True
-                        break
-                if not found_group:
-                    duplicates.append([seen[key], photo])
-            else:
-                seen[key] = photo
-        
-        return duplicates
+            phash = self._perceptual_hash(photo['file_path'])
+            if phash is not None:
+                photos.append(photo)
+                hashes.append(phash)
+        if len(photos) < 2:
+            return []
+        
+        max_distance = int((1 - similarity_threshold) * 64)
+        hashes = np.array(hashes, dtype=np.uint64)
+        
+        # Union-find over every pair within max_distance
+        parent = list(range(len(photos)))
+        
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+        
+        for start in range(0, len(hashes), HAMMING_BLOCK_ROWS):
+            block = hashes[start:start + HAMMING_BLOCK_ROWS]
+            distances = _popcount64(block[:, None] ^ hashes[None, :])
+            for i, j in zip(*np.nonzero(distances <= max_distance)):
+                i += start
+                if i < j:
+                    parent[find(i)] = find(j)
+        
+        groups = {}
+        for i, photo in enumerate(photos):
+            groups.setdefault(find(i), []).append(photo)
+        return [group for group in groups.values() if len(group) > 1]
+    
+    def _perceptual_hash(self, file_path: str) -> Optional[int]:
+        """64-bit difference hash of a photo, cached by path, mtime and size.
+        
+        Returns None if the photo cannot be read or is featureless.
+        """
+        try:
+            stat = os.stat(file_path)
+        except OSError as e:
+            logger.warning(f"Could not read {file_path}: {e}")
+            return None
+        
+        key = (file_path, stat.st_mtime_ns, stat.st_size)
+        with _PHASH_CACHE_LOCK:
+            if key in _PHASH_CACHE:
+                _PHASH_CACHE.move_to_end(key)
+                return _PHASH_CACHE[key]
+        
+        try:
+            with Image.open(file_path) as img:
+                # Lets the JPEG decoder downscale instead of decoding full size
+                img.draft('L', (64, 64))
+                small = img.convert('L').resize((9, 8), Image.Resampling.LANCZOS)
+        except Exception as e:
+            logger.warning(f"Could not hash {file_path}: {e}")
+            return None
+        pixels = np.asarray(small, dtype=np.int16)
+        if np.ptp(pixels) < FLAT_IMAGE_RANGE:
+            logger.info(f"Skipping featureless photo in duplicate check: {file_path}")
+            phash = None
+        else:
+            bits = pixels[:, 1:] > pixels[:, :-1]
+            phash = int.from_bytes(np.packbits(bits).tobytes(), 'big')
+        
+        with _PHASH_CACHE_LOCK:
+            _PHASH_CACHE[key] = phash
+            if len(_PHASH_CACHE) > PHASH_CACHE_SIZE:
+                _PHASH_CACHE.popitem(last=False)
+        return phash
     
     def generate_field_report(self, output_path: Optional[str] = None) -> str:
         """Generate a field report from photo metadata."""
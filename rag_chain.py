@@ -4,7 +4,7 @@ Implements Retrieval-Augmented Generation for archaeological survey chatbot
 """
 
 import os
-from typing import List, Optional
+from typing import Iterator, List, Optional, Tuple
 from langchain_openai import ChatOpenAI
 
 # Handle LangChain version differences for chains
@@ -37,6 +37,46 @@ logger = logging.getLogger(__name__)
 
 load_dotenv()
 
+ERROR_ANSWER_PREFIX = "I encountered an error"
+
+
+class AnswerStream:
+    """
+    Iterator over streamed answer text that records whether generation failed
+    
+    If the LLM raises, the error message is yielded as the last chunk, possibly
+    after partial output, and failed is set; callers check failed once the
+    stream is consumed instead of inspecting the text.
+    """
+    
+    def __init__(self, chunks: Iterator[str]):
+        self._chunks = chunks
+        self.failed = False
+    
+    def __iter__(self) -> Iterator[str]:
+        return self
+    
+    def __next__(self) -> str:
+        try:
+            return next(self._chunks)
+        except StopIteration:
+            raise
+        except Exception as e:
+            logger.error(f"Error streaming RAG answer: {e}")
+            return self._fail(e)
+    
+    def _fail(self, e: Exception) -> str:
+        self.failed = True
+        self._chunks = iter(())
+        return f"{ERROR_ANSWER_PREFIX}: {str(e)}"
+    
+    @classmethod
+    def error(cls, e: Exception) -> "AnswerStream":
+        """A failed stream holding only the error message for e"""
+        stream = cls(iter(()))
+        stream._chunks = iter([stream._fail(e)])
+        return stream
+
 
 class ArchaeologicalRAGChain:
     """RAG chain for archaeological survey chatbot"""
@@ -67,6 +107,7 @@ class ArchaeologicalRAGChain:
         self.prompt_template = self._create_prompt_template()
         
         # Initialize QA chain
+        self.retriever = None
         self.qa_chain = None
         self._initialize_qa_chain()
     
@@ -126,6 +167,7 @@ Answer:"""
         retriever = self.vector_store_manager.vector_store.as_retriever(
             search_kwargs={"k": 4}
         )
+        self.retriever = retriever
         
         # Create QA chain
         try:
@@ -163,10 +205,60 @@ Answer:"""
         except Exception as e:
             logger.error(f"Error querying RAG system: {e}")
             return {
-                "answer": f"I encountered an error: {str(e)}",
+                "answer": f"{ERROR_ANSWER_PREFIX}: {str(e)}",
                 "source_documents": []
             }
     
+    def query_stream(self, question: str) -> Tuple[List, AnswerStream]:
+        """
+        Query the RAG system, streaming the answer as it is generated
+        
+        Retrieval runs eagerly so the source documents are available before
+        the first token; generation is deferred until the iterator is consumed.
+        
+        Args:
+            question: User's question
+        
+        Returns:
+            Tuple of (source documents, AnswerStream of answer text chunks)
+        """
+        if self.retriever is None:
+            raise ValueError("QA chain not initialized")
+        
+        try:
+            source_documents = self.retriever.invoke(question)
+        except Exception as e:
+            logger.error(f"Error retrieving documents: {e}")
+            return [], AnswerStream.error(e)
+        
+        prompt = self.prompt_template.format(
+            context=self._format_context(source_documents), question=question
+        )
+        return source_documents, AnswerStream(self._stream_answer(prompt))
+    
+    @staticmethod
+    def _format_context(source_documents: List) -> str:
+        """
+        Join retrieved chunks into the prompt context in document order
+        
+        Follow-up questions often retrieve the same chunks in a different
+        relevance order. A fixed order makes the prompt byte-identical up to
+        the question, so the provider's prompt-prefix cache (automatic on
+        OpenAI for prompts over 1024 tokens) can reuse the processed context.
+        Source documents shown to the user keep their relevance order.
+        """
+        ordered = sorted(
+            source_documents,
+            key=lambda doc: (doc.metadata.get("chunk_index", -1), doc.page_content)
+        )
+        return "\n\n".join(doc.page_content for doc in ordered)
+    
+    def _stream_answer(self, prompt: str) -> Iterator[str]:
+        """Yield answer text chunks from the LLM"""
+        for chunk in self.llm.stream(prompt):
+            if chunk.content:
+                yield chunk.content
+    
     def get_sources(self, source_documents: List) -> List[dict]:
         """
         Format source documents for display
@@ -50,9 +50,13 @@ def setup_vector_store(pdf_path: str):
     vector_store_manager = VectorStoreManager(
         embedding_model="sentence-transformers/all-MiniLM-L6-v2",
         vector_store_type="faiss",
-        persist_directory="./vector_store"
+        persist_directory="./vector_store",
+        backend=os.getenv("EMBEDDING_BACKEND", "onnx-int8")
     )
     vector_store_manager.create_vector_store(text_chunks)
+    # Map/timeline tables saved by the app belong to the previous index
+    for stale in Path("./vector_store").glob("auto_*.parquet"):
+        stale.unlink()
     logger.info("✓ Vector store created successfully!")
     
     return True
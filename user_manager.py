@@ -303,7 +303,6 @@ class StreamlitSessionManager:
             del session_state.user_session_id
         if 'user_data' in session_state:
             del session_state.user_data
-        session_state.messages = []  # Clear chat history
     
     def is_logged_in(self, session_state) -> bool:
         """Check if user is logged in."""
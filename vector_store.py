@@ -3,9 +3,18 @@ Vector Store Module for RAG System
 Creates and manages embeddings and vector database
 """
 
+import hashlib
+import importlib.util
+import json
 import os
 import pickle
-from typing import List, Optional, Dict
+import shutil
+import tempfile
+import threading
+from typing import Callable, List, Optional, Dict
+
+import faiss
+import numpy as np
 try:
     from langchain_community.embeddings import HuggingFaceEmbeddings
     from langchain_community.vectorstores import FAISS, Chroma
@@ -30,19 +39,244 @@ except ImportError:
     except ImportError:
         raise ImportError("Could not import Document. Please install langchain-core: pip install langchain-core")
 
+try:
+    from langchain_core.embeddings import Embeddings
+except ImportError:
+    try:
+        from langchain.embeddings.base import Embeddings
+    except ImportError:
+        raise ImportError("Could not import Embeddings. Please install langchain-core: pip install langchain-core")
+
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Written next to a persisted store: the embedding model and runtime it was built with
+EMBEDDING_INFO_FILE = "embedding_info.json"
+
+
+def _int8_isa() -> str:
+    """
+    Best int8 instruction set on this CPU, named as an optimum AutoQuantizationConfig
+    
+    AVX512-VNNI executes int8 dot products in one instruction; plain AVX-512
+    and AVX2 are the fallbacks. Non-Linux hosts use AVX2.
+    """
+    try:
+        with open("/proc/cpuinfo") as f:
+            flags = next((line.split(":", 1)[1].split() for line in f if line.startswith("flags")), [])
+    except OSError:
+        return "avx2"
+    if "avx512_vnni" in flags:
+        return "avx512_vnni"
+    if "avx512f" in flags:
+        return "avx512"
+    return "avx2"
+
+
+def _embed_length_sorted(texts: List[str], token_length: Callable[[str], int],
+                         encode: Callable[[List[str]], np.ndarray], batch_size: int,
+                         progress_callback: Optional[Callable[[float], None]] = None) -> np.ndarray:
+    """
+    Embed texts in batches of similar token length, returned in the original order
+    
+    Args:
+        texts: Texts to embed
+        token_length: Returns the number of tokens in a text
+        encode: Embeds one batch of texts as an array
+        batch_size: Number of texts per encode call
+        progress_callback: Called with the fraction of texts embedded so far
+            after each batch
+    
+    Returns:
+        Float32 array of shape (len(texts), embedding_dim)
+    """
+    order = np.argsort([token_length(text) for text in texts], kind="stable")
+    vectors = np.empty((len(texts), 0), dtype=np.float32)
+    for start in range(0, len(order), batch_size):
+        batch_idx = order[start:start + batch_size]
+        batch_vectors = encode([texts[i] for i in batch_idx])
+        if start == 0:
+            vectors = np.empty((len(texts), batch_vectors.shape[1]), dtype=np.float32)
+        vectors[batch_idx] = batch_vectors
+        if progress_callback:
+            progress_callback(min(start + batch_size, len(texts)) / len(texts))
+    return vectors
+
+
+class ONNXInt8Embeddings(Embeddings):
+    """Sentence-transformer embeddings from an int8-quantized ONNX export run on ONNX Runtime (CPU)"""
+    
+    QUANTIZED_FILE_NAME = "model_quantized.onnx"
+    
+    def __init__(self, model_name: str, cache_directory: str = "./onnx_models",
+                 batch_size: int = 64, max_length: int = 256):
+        """
+        Load (exporting and quantizing on first use) an ONNX int8 embedding model
+        
+        Args:
+            model_name: HuggingFace sentence-transformers model name
+            cache_directory: Directory holding the exported, quantized models
+            batch_size: Number of texts encoded per ONNX Runtime call
+            max_length: Maximum tokens per text
+        """
+        try:
+            from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+            from optimum.onnxruntime.configuration import AutoQuantizationConfig
+            from transformers import AutoTokenizer
+        except ImportError:
+            raise ImportError("The onnx-int8 embedding backend requires optimum and onnxruntime. "
+                              "Please install: pip install optimum[onnxruntime]")
+        
+        self.batch_size = batch_size
+        self.max_length = max_length
+        # Fast tokenizers are not safe to call from several threads at once
+        # ("Already borrowed"); sessions embed queries concurrently
+        self._tokenizer_lock = threading.Lock()
+        isa = _int8_isa()
+        model_dir = os.path.join(cache_directory, model_name.replace("/", "__"))
+        if isa != "avx2":
+            # Quantized per instruction set, so hosts sharing the cache don't mix exports
+            model_dir += f"__{isa}"
+        
+        if not os.path.exists(os.path.join(model_dir, self.QUANTIZED_FILE_NAME)):
+            logger.info(f"Exporting {model_name} to ONNX int8 for {isa} (one-time)")
+            export_dir = model_dir + "_fp32"
+            model = ORTModelForFeatureExtraction.from_pretrained(model_name, export=True)
+            model.save_pretrained(export_dir)
+            AutoTokenizer.from_pretrained(model_name).save_pretrained(model_dir)
+            quantizer = ORTQuantizer.from_pretrained(export_dir)
+            quantizer.quantize(
+                save_dir=model_dir,
+                quantization_config=getattr(AutoQuantizationConfig, isa)(is_static=False, per_channel=False)
+            )
+            shutil.rmtree(export_dir, ignore_errors=True)
+        
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.model = ORTModelForFeatureExtraction.from_pretrained(
+            model_dir,
+            file_name=self.QUANTIZED_FILE_NAME,
+            provider="CPUExecutionProvider"
+        )
+    
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """Mean-pool and L2-normalize token embeddings, matching sentence-transformers"""
+        with self._tokenizer_lock:
+            inputs = self.tokenizer(texts, padding=True, truncation=True,
+                                    max_length=self.max_length, return_tensors="np")
+        token_embeddings = np.asarray(self.model(**inputs).last_hidden_state, dtype=np.float32)
+        mask = inputs["attention_mask"][..., None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+    
+    def token_length(self, text: str) -> int:
+        """Number of tokens in text"""
+        with self._tokenizer_lock:
+            return len(self.tokenizer.tokenize(text))
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts in length-sorted batches, returned in the original order"""
+        return _embed_length_sorted(texts, self.token_length, self._encode, self.batch_size).tolist()
+    
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a single query"""
+        return self._encode([text])[0].tolist()
+
+
+def _cuda_available() -> bool:
+    """Whether torch is installed and can see a CUDA device"""
+    try:
+        import torch
+    except ImportError:
+        return False
+    return torch.cuda.is_available()
+
+
+def resolve_backend(backend: str) -> str:
+    """
+    Embedding runtime that will actually be used for backend
+    
+    onnx-int8 falls back to torch when optimum or onnxruntime is not installed.
+    """
+    if backend == "onnx-int8" and (importlib.util.find_spec("optimum") is None
+                                   or importlib.util.find_spec("onnxruntime") is None):
+        logger.warning("optimum[onnxruntime] is not installed; using the torch embedding backend")
+        return "torch"
+    return backend
+
+
+def load_embeddings(embedding_model: str, backend: str = "torch", batch_size: int = 64,
+                    fp16: bool = True) -> Embeddings:
+    """
+    Load an embedding model for the given runtime
+    
+    Args:
+        embedding_model: HuggingFace model name for embeddings
+        backend: "torch" (sentence-transformers), "torch-int8" (sentence-transformers
+            with dynamically int8-quantized Linear layers), "onnx-int8" (quantized
+            ONNX Runtime) or "infinity" (an Infinity embedding server at
+            INFINITY_API_URL, default http://localhost:7997)
+        batch_size: Number of texts encoded per ONNX Runtime call
+        fp16: Cast the torch model to half precision when it runs on a GPU
+    
+    Returns:
+        LangChain Embeddings instance
+    """
+    backend = resolve_backend(backend)
+    logger.info(f"Loading embedding model: {embedding_model} ({backend})")
+    if backend in ("torch", "torch-int8"):
+        # Dynamic int8 quantization is CPU-only; fp32 runs on a GPU when present
+        device = "cuda" if backend == "torch" and _cuda_available() else "cpu"
+        embeddings = HuggingFaceEmbeddings(
+            model_name=embedding_model,
+            model_kwargs={'device': device}
+        )
+        if backend == "torch-int8":
+            import torch
+            torch.quantization.quantize_dynamic(
+                embeddings.client, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+            )
+        elif device == "cuda" and fp16:
+            # Half precision doubles tensor-core throughput and halves activation
+            # memory; recent transformers already route BERT attention through SDPA
+            embeddings.client.half()
+        return embeddings
+    if backend == "onnx-int8":
+        return ONNXInt8Embeddings(embedding_model, batch_size=batch_size)
+    if backend == "infinity":
+        # Encoding runs out of process; the server batches requests from all sessions
+        from langchain_community.embeddings import InfinityEmbeddings
+        return InfinityEmbeddings(
+            model=embedding_model,
+            infinity_api_url=os.getenv("INFINITY_API_URL", "http://localhost:7997"),
+        )
+    raise ValueError(f"Unknown embedding backend: {backend}")
+
 
 class VectorStoreManager:
     """Manage vector store for document embeddings"""
     
+    # Chunks encoded per batch when building the store, by embedding device
+    CPU_BATCH_SIZE = 64
+    GPU_BATCH_SIZE = 128
+    
+    # Below this many chunks a float32 flat index is small enough to keep exact
+    SQ8_MIN_CHUNKS = 1000
+    # From this many chunks exhaustive search is replaced by IVF-PQ
+    IVFPQ_MIN_CHUNKS = 10_000
+    IVF_NLIST = 256
+    IVF_NPROBE = 8
+    PQ_SUBQUANTIZERS = 16
+    
     def __init__(self, 
                  embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2",
                  vector_store_type: str = "faiss",
-                 persist_directory: Optional[str] = None):
+                 persist_directory: Optional[str] = None,
+                 batch_size: Optional[int] = None,
+                 quantize: str = "auto",
+                 backend: str = "torch",
+                 embeddings: Optional[Embeddings] = None):
         """
         Initialize vector store manager
         
@@ -50,16 +284,32 @@ class VectorStoreManager:
             embedding_model: HuggingFace model name for embeddings
             vector_store_type: "faiss" or "chroma"
             persist_directory: Directory to persist vector store
+            batch_size: Number of chunks encoded per batch when building the store
+                (default: GPU_BATCH_SIZE on a CUDA device, otherwise CPU_BATCH_SIZE)
+            quantize: FAISS index encoding - "sq8" (8-bit scalar quantizer),
+                "ivfpq" (inverted file + product quantizer), "none" (float32 flat),
+                or "auto" (sq8 above SQ8_MIN_CHUNKS, ivfpq from IVFPQ_MIN_CHUNKS chunks)
+            backend: Embedding runtime - "torch" (sentence-transformers), "torch-int8"
+                (sentence-transformers with int8 dynamic quantization),
+                "onnx-int8" (quantized ONNX Runtime, requires optimum) or
+                "infinity" (remote Infinity embedding server)
+            embeddings: Already-loaded embedding model to use instead of loading
+                embedding_model with backend. A persisted store built with a
+                different model or backend is queried with that one instead.
         """
         self.embedding_model = embedding_model
         self.vector_store_type = vector_store_type
         self.persist_directory = persist_directory or "./vector_store"
+        self.quantize = quantize
+        self.backend = resolve_backend(backend)
         
-        # Initialize embeddings
-        logger.info(f"Loading embedding model: {embedding_model}")
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name=embedding_model,
-            model_kwargs={'device': 'cpu'}
+        # Initialize embeddings (reusing a preloaded model when one is given)
+        self.embeddings = embeddings or load_embeddings(
+            embedding_model, backend, batch_size or self.CPU_BATCH_SIZE
+        )
+        device = str(getattr(getattr(self.embeddings, "client", None), "device", "cpu"))
+        self.batch_size = batch_size or (
+            self.GPU_BATCH_SIZE if device.startswith("cuda") else self.CPU_BATCH_SIZE
         )
         
         self.vector_store = None
@@ -69,13 +319,155 @@ class VectorStoreManager:
             length_function=len,
         )
     
-    def create_vector_store(self, texts: List[str], metadata: Optional[List[Dict]] = None):
+    def _batch_encoder(self):
+        """
+        Token length and batch encode functions for the loaded embedding model
+        
+        Returns:
+            Tuple of (token_length(text) -> int, encode(texts) -> array), or
+            (None, None) when the model only offers LangChain's embed_documents
+        """
+        if isinstance(self.embeddings, ONNXInt8Embeddings):
+            return self.embeddings.token_length, self.embeddings._encode
+        
+        model = getattr(self.embeddings, "client", None)
+        if model is None or not hasattr(model, "tokenizer"):
+            return None, None
+        
+        encode_kwargs = dict(getattr(self.embeddings, "encode_kwargs", None) or {})
+        encode_kwargs.pop("batch_size", None)
+        
+        def encode(batch: List[str]) -> np.ndarray:
+            return model.encode(
+                batch,
+                batch_size=len(batch),
+                convert_to_numpy=True,
+                show_progress_bar=False,
+                **encode_kwargs
+            )
+        
+        return lambda text: len(model.tokenizer.tokenize(text)), encode
+    
+    def embed_documents(self, texts: List[str],
+                        progress_callback: Optional[Callable[[float], None]] = None) -> np.ndarray:
+        """
+        Embed texts in length-sorted batches
+        
+        Sorting by token length means each batch is padded only to the length
+        of its own longest member rather than to outliers elsewhere in the
+        document. Results are returned in the original order.
+        
+        Args:
+            texts: Texts to embed
+            progress_callback: Called with the fraction of texts embedded so far
+                after each batch
+        
+        Returns:
+            Array of shape (len(texts), embedding_dim)
+        """
+        token_length, encode = self._batch_encoder()
+        if encode is None:
+            vectors = np.asarray(self.embeddings.embed_documents(texts), dtype=np.float32)
+            if progress_callback:
+                progress_callback(1.0)
+            return vectors
+        
+        return _embed_length_sorted(texts, token_length, encode, self.batch_size, progress_callback)
+    
+    @staticmethod
+    def _dedupe_documents(documents: List[Document]) -> List[Document]:
+        """
+        Drop chunks whose text repeats an earlier chunk
+        
+        Running headers, footers and boilerplate pages otherwise get embedded
+        and retrieved once per occurrence. Texts are compared after collapsing
+        whitespace and case; the kept chunk lists the chunk_index of each
+        dropped copy under "duplicate_chunks" (comma-separated, since Chroma
+        metadata values must be scalars).
+        
+        Args:
+            documents: Split documents in document order
+        
+        Returns:
+            First occurrence of each distinct chunk, in order
+        """
+        first_seen = {}
+        duplicates = {}
+        unique = []
+        for doc in documents:
+            normalized = " ".join(doc.page_content.split()).lower()
+            digest = hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).digest()
+            if digest in first_seen:
+                duplicates.setdefault(first_seen[digest], []).append(str(doc.metadata.get("chunk_index")))
+                continue
+            first_seen[digest] = len(unique)
+            unique.append(doc)
+        
+        for position, chunk_indices in duplicates.items():
+            unique[position].metadata["duplicate_chunks"] = ",".join(chunk_indices)
+        if duplicates:
+            logger.info(f"Dropped {len(documents) - len(unique)} duplicate chunks")
+        return unique
+    
+    def _index_encoding(self, n_chunks: int) -> str:
+        """FAISS index encoding for a store of n_chunks: none, sq8 or ivfpq"""
+        if self.quantize == "auto":
+            if n_chunks >= self.IVFPQ_MIN_CHUNKS:
+                return "ivfpq"
+            return "sq8" if n_chunks > self.SQ8_MIN_CHUNKS else "none"
+        if self.quantize not in ("sq8", "ivfpq", "none"):
+            raise ValueError(f"Unknown quantize option: {self.quantize}")
+        return self.quantize
+    
+    def _build_sq8_index(self, vectors: np.ndarray):
+        """
+        Build an 8-bit scalar-quantized FAISS index (4x smaller than float32)
+        
+        Vectors are added in the same order as the flat index they replace,
+        so the docstore id mapping stays valid.
+        """
+        index = faiss.IndexScalarQuantizer(
+            vectors.shape[1], faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_L2
+        )
+        index.train(vectors)
+        index.add(vectors)
+        logger.info(f"Quantized {index.ntotal} embeddings to 8-bit")
+        return index
+    
+    def _build_ivfpq_index(self, vectors: np.ndarray):
+        """
+        Build an IVF-PQ FAISS index with an HNSW coarse quantizer
+        
+        Queries scan only IVF_NPROBE of IVF_NLIST clusters and compare against
+        PQ codes, so search cost stops growing linearly with the corpus. Falls
+        back to the 8-bit scalar quantizer when the embedding dimension does
+        not split evenly into PQ_SUBQUANTIZERS.
+        """
+        dim = vectors.shape[1]
+        if dim % self.PQ_SUBQUANTIZERS:
+            logger.warning(f"Embedding dimension {dim} not divisible by "
+                           f"{self.PQ_SUBQUANTIZERS}; using 8-bit scalar quantizer instead")
+            return self._build_sq8_index(vectors)
+        
+        quantizer = faiss.IndexHNSWFlat(dim, 32)
+        index = faiss.IndexIVFPQ(quantizer, dim, self.IVF_NLIST, self.PQ_SUBQUANTIZERS, 8)
+        index.train(vectors)
+        index.add(vectors)
+        # nprobe is written with the index, so loaded stores keep it
+        index.nprobe = self.IVF_NPROBE
+        logger.info(f"Indexed {index.ntotal} embeddings with IVF{self.IVF_NLIST},PQ{self.PQ_SUBQUANTIZERS}")
+        return index
+    
+    def create_vector_store(self, texts: List[str], metadata: Optional[List[Dict]] = None,
+                            progress_callback: Optional[Callable[[float], None]] = None):
         """
         Create vector store from text chunks
         
         Args:
             texts: List of text chunks
             metadata: Optional metadata for each chunk
+            progress_callback: Called with the fraction of chunks embedded so far
+                (FAISS stores only)
         """
         if not texts:
             raise ValueError("No texts provided for vector store creation")
@@ -90,15 +482,25 @@ class VectorStoreManager:
             documents.append(Document(page_content=text, metadata=doc_metadata))
         
         # Split documents if needed
-        split_docs = self.text_splitter.split_documents(documents)
-        logger.info(f"Split into {len(split_docs)} documents")
+        split_docs = self._dedupe_documents(self.text_splitter.split_documents(documents))
+        logger.info(f"Split into {len(split_docs)} unique documents")
         
         # Create vector store
         if self.vector_store_type == "faiss":
-            self.vector_store = FAISS.from_documents(split_docs, self.embeddings)
+            split_texts = [doc.page_content for doc in split_docs]
+            vectors = self.embed_documents(split_texts, progress_callback)
+            self.vector_store = FAISS.from_embeddings(
+                list(zip(split_texts, vectors.tolist())),
+                self.embeddings,
+                metadatas=[doc.metadata for doc in split_docs]
+            )
+            encoding = self._index_encoding(len(split_texts))
+            if encoding == "sq8":
+                self.vector_store.index = self._build_sq8_index(vectors)
+            elif encoding == "ivfpq":
+                self.vector_store.index = self._build_ivfpq_index(vectors)
             # Save FAISS index
-            os.makedirs(self.persist_directory, exist_ok=True)
-            self.vector_store.save_local(self.persist_directory)
+            self._save_faiss()
             logger.info(f"FAISS vector store saved to {self.persist_directory}")
         
         elif self.vector_store_type == "chroma":
@@ -108,24 +510,135 @@ class VectorStoreManager:
                 self.embeddings,
                 persist_directory=self.persist_directory
             )
+            self._write_embedding_info(self.persist_directory)
             logger.info(f"Chroma vector store saved to {self.persist_directory}")
         
         else:
             raise ValueError(f"Unknown vector store type: {self.vector_store_type}")
     
-    def load_vector_store(self):
-        """Load existing vector store from disk"""
+    def _save_faiss(self):
+        """
+        Persist the FAISS store by writing to a scratch directory and renaming
+        
+        Other processes or sessions may have the previous index memory-mapped,
+        so files are replaced rather than truncated and rewritten in place.
+        """
+        os.makedirs(self.persist_directory, exist_ok=True)
+        scratch_dir = tempfile.mkdtemp(dir=self.persist_directory)
+        try:
+            self.vector_store.save_local(scratch_dir)
+            self._write_embedding_info(scratch_dir)
+            for file_name in os.listdir(scratch_dir):
+                os.replace(
+                    os.path.join(scratch_dir, file_name),
+                    os.path.join(self.persist_directory, file_name)
+                )
+        finally:
+            shutil.rmtree(scratch_dir, ignore_errors=True)
+    
+    def _write_embedding_info(self, directory: str):
+        """Record the embedding model and runtime the store is built with"""
+        with open(os.path.join(directory, EMBEDDING_INFO_FILE), "w", encoding="utf-8") as f:
+            json.dump({"embedding_model": self.embedding_model, "backend": self.backend}, f)
+    
+    def _use_stored_embeddings(self):
+        """
+        Switch to the embedding model and runtime the persisted store was built with
+        
+        Query vectors from another runtime (e.g. int8 ONNX against a torch-built
+        index) drift from the stored ones, so a mismatch is logged and the
+        store's own model is loaded. Stores saved before the runtime was
+        recorded were built with sentence-transformers on torch.
+        """
+        info_path = os.path.join(self.persist_directory, EMBEDDING_INFO_FILE)
+        info = {"embedding_model": self.embedding_model, "backend": "torch"}
+        if os.path.exists(info_path):
+            with open(info_path, encoding="utf-8") as f:
+                info.update(json.load(f))
+        
+        embedding_model, backend = info["embedding_model"], resolve_backend(info["backend"])
+        if (embedding_model, backend) == (self.embedding_model, self.backend):
+            return
+        logger.warning(f"Vector store was built with {embedding_model} ({backend}), "
+                       f"not {self.embedding_model} ({self.backend}); embedding queries to match")
+        self.embedding_model, self.backend = embedding_model, backend
+        self.embeddings = load_embeddings(embedding_model, backend, self.batch_size)
+    
+    @staticmethod
+    def _prefetch(path: str):
+        """
+        Ask the kernel to read a file into the page cache ahead of use
+        
+        The mapped index is then served from RAM on the first searches instead
+        of faulting pages in from disk one at a time. No-op where
+        posix_fadvise is unavailable.
+        """
+        if not hasattr(os, "posix_fadvise"):
+            return
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        finally:
+            os.close(fd)
+    
+    def _load_faiss_mmap(self):
+        """
+        Load the FAISS store with the index memory-mapped read-only where possible
+        
+        IO_FLAG_MMAP maps only the inverted lists of IVF indexes; the codes of
+        flat and SQ8 indexes (every store under IVFPQ_MIN_CHUNKS chunks) are
+        mapped by IO_FLAG_MMAP_IFC, which older faiss builds lack. The two
+        cannot be combined for IVF indexes, so each is tried in turn. Without
+        IO_FLAG_MMAP_IFC, flat and SQ8 indexes are read into RAM.
+        """
+        index_path = os.path.join(self.persist_directory, "index.faiss")
+        self._prefetch(index_path)
+        mmap_flags = [faiss.IO_FLAG_MMAP]
+        if hasattr(faiss, "IO_FLAG_MMAP_IFC"):
+            mmap_flags.insert(0, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_MMAP_IFC)
+        
+        index = None
+        for flags in mmap_flags:
+            try:
+                index = faiss.read_index(index_path, flags | faiss.IO_FLAG_READ_ONLY)
+                break
+            except RuntimeError as e:
+                error = e
+        if index is None:
+            # Not every index type supports mmap; fall back to reading into RAM
+            logger.warning(f"Could not memory-map FAISS index, reading into memory: {error}")
+            index = faiss.read_index(index_path)
+        
+        with open(os.path.join(self.persist_directory, "index.pkl"), "rb") as f:
+            docstore, index_to_docstore_id = pickle.load(f)
+        
+        return FAISS(self.embeddings, index, docstore, index_to_docstore_id)
+    
+    def load_vector_store(self, mmap: bool = True):
+        """
+        Load existing vector store from disk
+        
+        Args:
+            mmap: Memory-map the FAISS index read-only instead of reading it
+                into RAM (see _load_faiss_mmap for which indexes can be mapped).
+                The loaded store must not be appended to; use
+                create_vector_store to rebuild it instead.
+        """
         if not os.path.exists(self.persist_directory):
             raise FileNotFoundError(f"Vector store not found at {self.persist_directory}")
         
         logger.info(f"Loading vector store from {self.persist_directory}")
+        self._use_stored_embeddings()
         
         if self.vector_store_type == "faiss":
-            self.vector_store = FAISS.load_local(
-                self.persist_directory,
-                self.embeddings,
-                allow_dangerous_deserialization=True
-            )
+            if mmap:
+                self.vector_store = self._load_faiss_mmap()
+            else:
+                self.vector_store = FAISS.load_local(
+                    self.persist_directory,
+                    self.embeddings,
+                    allow_dangerous_deserialization=True
+                )
         elif self.vector_store_type == "chroma":
             self.vector_store = Chroma(
                 persist_directory=self.persist_directory,